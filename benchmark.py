@@ -0,0 +1,696 @@
+import argparse
+import csv
+import gc
+import importlib
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource模块，此时不记录RSS
+    resource = None
+
+from plotting import get_pyplot, show_or_save
+
+# 可测试的引擎：名称 -> (模块名, 类名, 填充方法名, 方法的其他参数)，用到时才导入对应模块
+# game_0_6.ENGINES中新增的引擎会以默认参数自动加入，见engine_registry
+BENCH_ENGINES = {
+    "Board": ("game_0_5", "Board", "fill", {}),
+    "OptimizedBoard": ("game_0_5", "OptimizedBoard", "fill", {}),
+    "lut2": ("game_0_6", "Board", "fill_lut", {"block": 2}),
+    "lut8": ("game_0_6", "Board", "fill_lut", {"block": 8}),
+    "morton": ("game_0_6", "MortonBoard", "fill", {}),
+}
+
+
+def engine_registry():
+    """
+    所有可测试的引擎
+
+    :return: dict，名称 -> (模块名, 类名, 填充方法名, 方法的其他参数)
+    """
+    from game_0_6 import ENGINES
+
+    registry = dict(BENCH_ENGINES)
+    for name, method in ENGINES.items():
+        registry.setdefault(name, ("game_0_6", "Board", method, {}))
+    return registry
+
+
+def register_engine(name, module_name, class_name, method, **kwargs):
+    """
+    登记一个可测试的引擎，例如同一填充方法的不同参数
+
+    :param name: 引擎名
+    :param module_name: 模块名
+    :param class_name: 棋盘类名，构造参数为(side, x, y)
+    :param method: 填充方法名，参数为(t_x, t_y, side, d_x, d_y, **kwargs)
+    :param kwargs: 每次调用填充方法时附加的参数
+    :return: name
+    """
+    BENCH_ENGINES[name] = (module_name, class_name, method, kwargs)
+    return name
+
+
+def _load_engine(engine):
+    """
+    导入引擎所在的模块
+
+    :param engine: 引擎名
+    :return: (棋盘类, 填充方法名, 方法的其他参数)
+    """
+    module_name, class_name, method, kwargs = engine_registry()[engine]
+    board_class = getattr(importlib.import_module(module_name), class_name)
+    return board_class, method, kwargs
+
+
+def time_engine(
+    engine,
+    k,
+    x,
+    y,
+    warmup=1,
+    min_repeats=3,
+    max_repeats=50,
+    min_time=0.5,
+    disable_gc=True,
+):
+    """
+    在当前进程中多次测量一个引擎填充一个棋盘的时间
+
+    先预热warmup次，再至少重复min_repeats次，直到累计时间达到min_time秒
+    或次数达到max_repeats为止。只计填充本身，不计构造棋盘。
+
+    :param engine: 引擎名，见engine_registry
+    :param k: 棋盘大小的指数
+    :param x: 特殊点横坐标
+    :param y: 特殊点纵坐标
+    :param warmup: 预热次数，不计入结果
+    :param min_repeats: 最少测量次数
+    :param max_repeats: 最多测量次数
+    :param min_time: 累计测量时间达到该秒数后停止
+    :param disable_gc: 测量期间是否关闭垃圾回收
+    :return: 每次的运行时间列表（纳秒）
+    """
+    board_class, method, kwargs = _load_engine(engine)
+    side = 2**k
+    # 递归引擎的深度只有k，但旧代码没有保证递归上限，这里放宽一些
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * k + 1000))
+    samples = []
+    total = 0
+    for i in range(warmup + max_repeats):
+        board = board_class(side, x, y)
+        fill = getattr(board, method)
+        gc.collect()
+        if disable_gc:
+            gc.disable()
+        try:
+            start_time = time.perf_counter_ns()
+            fill(0, 0, side, x, y, **kwargs)
+            elapsed = time.perf_counter_ns() - start_time
+        finally:
+            gc.enable()
+        if i < warmup:
+            continue
+        samples.append(elapsed)
+        total += elapsed
+        if len(samples) >= min_repeats and total >= min_time * 1e9:
+            break
+    return samples
+
+
+def time_engine_isolated(engine, k, x, y, **options):
+    """
+    在新的子进程中运行time_engine，避免前面的测量留下的内存和缓存状态影响结果
+
+    :param engine: 引擎名
+    :param k: 棋盘大小的指数
+    :param x: 特殊点横坐标
+    :param y: 特殊点纵坐标
+    :param options: 传给time_engine的其他参数
+    :return: 每次的运行时间列表（纳秒）
+    """
+    return _run_isolated("time", engine, k, x, y, options)
+
+
+def measure_memory(engine, k, x, y):
+    """
+    测量一个引擎构造并填充一个棋盘时的内存占用
+
+    tracemalloc会明显拖慢运行，所以与计时分开单独运行。
+    同一棋盘先后求解两次：第一次还包括模块中各种按需建立并缓存的查找表，
+    第二次才是稳定状态下每次求解的开销，两者分别记录。
+    RSS峰值是整个进程的历史最大值，取第一次求解前后之差，包含建表的开销；
+    只有在新的子进程中测量时才准确，否则是这次运行的下界。
+
+    :param engine: 引擎名，见engine_registry
+    :param k: 棋盘大小的指数
+    :param x: 特殊点横坐标
+    :param y: 特殊点纵坐标
+    :return: dict，tracemalloc_peak为第二次求解时Python和NumPy分配的峰值字节数，
+        tracemalloc_cold_peak为第一次的峰值，
+        rss_before、rss_peak为第一次求解前后的RSS峰值字节数（不支持时为None）
+    """
+    board_class, method, kwargs = _load_engine(engine)
+    side = 2**k
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * k + 1000))
+    gc.collect()
+    rss_before = _rss_peak()
+    cold = _traced_peak(board_class, method, kwargs, side, x, y)
+    rss_peak = _rss_peak()
+    gc.collect()
+    peak = _traced_peak(board_class, method, kwargs, side, x, y)
+    return {
+        "tracemalloc_peak": peak,
+        "tracemalloc_cold_peak": cold,
+        "rss_before": rss_before,
+        "rss_peak": rss_peak,
+    }
+
+
+def _traced_peak(board_class, method, kwargs, side, x, y):
+    """
+    在tracemalloc下构造并填充一个棋盘
+
+    :param board_class: 棋盘类
+    :param method: 填充方法名
+    :param kwargs: 填充方法的其他参数
+    :param side: 棋盘边长
+    :param x: 特殊点横坐标
+    :param y: 特殊点纵坐标
+    :return: 分配的峰值字节数
+    """
+    tracemalloc.start()
+    try:
+        board = board_class(side, x, y)
+        getattr(board, method)(0, 0, side, x, y, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_memory_isolated(engine, k, x, y):
+    """
+    在新的子进程中运行measure_memory
+
+    :param engine: 引擎名
+    :param k: 棋盘大小的指数
+    :param x: 特殊点横坐标
+    :param y: 特殊点纵坐标
+    :return: 同measure_memory
+    """
+    return _run_isolated("memory", engine, k, x, y, {})
+
+
+def _rss_peak():
+    """
+    当前进程的RSS峰值
+
+    :return: 字节数，不支持时为None
+    """
+    # Linux上子进程的ru_maxrss从父进程的峰值开始，VmHWM则在exec后重新计算
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux上单位为KB，macOS上为字节
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_isolated(mode, engine, k, x, y, options):
+    """
+    在新的子进程中运行一次测量
+
+    :param mode: "time"或"memory"
+    :param engine: 引擎名
+    :param k: 棋盘大小的指数
+    :param x: 特殊点横坐标
+    :param y: 特殊点纵坐标
+    :param options: 传给测量函数的其他参数
+    :return: 测量函数的结果
+    """
+    job = {"mode": mode, "engine": engine, "k": k, "x": x, "y": y, "options": options}
+    # register_engine登记的引擎子进程中没有，连同定义一起传过去
+    job["spec"] = engine_registry()[engine]
+    result = subprocess.run(
+        [sys.executable, "-c", "import benchmark; benchmark._worker()"],
+        input=json.dumps(job),
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError("子进程测量失败:\n" + result.stderr)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def _worker():
+    """
+    子进程入口：从标准输入读取任务，把测量结果以JSON写到标准输出最后一行
+
+    :return: None
+    """
+    job = json.loads(sys.stdin.read())
+    BENCH_ENGINES[job["engine"]] = tuple(job["spec"])
+    measure = time_engine if job["mode"] == "time" else measure_memory
+    print(
+        json.dumps(
+            measure(job["engine"], job["k"], job["x"], job["y"], **job["options"])
+        )
+    )
+
+
+def summarize(samples):
+    """
+    统计一组运行时间
+
+    :param samples: 运行时间列表（纳秒）
+    :return: dict，时间单位为秒：次数、中位数、四分位数、四分位距、
+        中位数的95%置信区间（按次序统计量，不假设分布）、最小值和平均值
+    """
+    data = sorted(s / 1e9 for s in samples)
+    n = len(data)
+    low, high = _median_ci_ranks(n)
+    return {
+        "n": n,
+        "median": _quantile(data, 0.5),
+        "q1": _quantile(data, 0.25),
+        "q3": _quantile(data, 0.75),
+        "iqr": _quantile(data, 0.75) - _quantile(data, 0.25),
+        "ci_low": data[low],
+        "ci_high": data[high],
+        "min": data[0],
+        "mean": sum(data) / n,
+    }
+
+
+def _quantile(data, p):
+    """
+    已排序数据的分位数（线性插值）
+
+    :param data: 已排序的列表
+    :param p: 0~1之间的分位点
+    :return: 分位数
+    """
+    pos = (len(data) - 1) * p
+    lower = math.floor(pos)
+    upper = min(lower + 1, len(data) - 1)
+    return data[lower] + (data[upper] - data[lower]) * (pos - lower)
+
+
+def _median_ci_ranks(n, z=1.96):
+    """
+    中位数置信区间两端在排序数据中的下标
+
+    中位数以下的样本个数服从B(n, 1/2)，用正态近似取两端的次序统计量；
+    样本太少时区间就是最小值到最大值。
+
+    :param n: 样本数
+    :param z: 正态分布分位数，1.96对应95%
+    :return: (下端下标, 上端下标)
+    """
+    half_width = z * math.sqrt(n) / 2
+    low = max(math.floor(n / 2 - half_width) - 1, 0)
+    high = min(math.ceil(n / 2 + half_width), n - 1)
+    return low, high
+
+
+# 特殊点位置模式
+PATTERNS = ("corner", "edge", "centre", "random", "adversarial")
+
+
+def workload_matrix(k, patterns=PATTERNS, positions=4, seed=0):
+    """
+    按模式生成特殊点位置，同一seed每次生成的位置相同
+
+    corner为四个角，centre为中心四格，edge为随机的边上非角格，random为均匀随机格，
+    adversarial为二进制位交替的坐标，使特殊点在每一层都换到不同的象限。
+
+    :param k: 棋盘大小的指数
+    :param patterns: 模式名列表
+    :param positions: edge、random模式各取的位置数
+    :param seed: 随机数种子
+    :return: dict，模式名 -> 去重后的[(x, y), ...]
+    """
+    side = 2**k
+    last = side - 1
+    rng = random.Random(seed * 1000003 + k)
+    # 0101...和1010...，逐层交替落在不同象限
+    low = int("01" * k, 2) >> k if k else 0
+    high = last ^ low
+    matrix = {}
+    for pattern in patterns:
+        if pattern == "corner":
+            cells = [(0, 0), (0, last), (last, 0), (last, last)]
+        elif pattern == "centre":
+            mid = side // 2
+            cells = [(mid, mid), (mid - 1, mid - 1), (mid - 1, mid), (mid, mid - 1)]
+        elif pattern == "edge":
+            cells = []
+            for _ in range(positions):
+                i = rng.randrange(1, last) if last > 1 else 0
+                cells.append(rng.choice([(0, i), (last, i), (i, 0), (i, last)]))
+        elif pattern == "random":
+            cells = [
+                (rng.randrange(side), rng.randrange(side)) for _ in range(positions)
+            ]
+        elif pattern == "adversarial":
+            cells = [(low, high), (high, low), (low, low), (high, high)]
+        else:
+            raise ValueError("未知的特殊点模式: %s" % pattern)
+        # k较小时不同模式可能重合，这里只在模式内去重
+        matrix[pattern] = [
+            cell
+            for i, cell in enumerate(cells)
+            if 0 <= min(cell) and cell not in cells[:i]
+        ]
+    return matrix
+
+
+def run_benchmark(
+    engines=("Board", "OptimizedBoard"),
+    k_values=range(1, 13),
+    patterns=PATTERNS,
+    positions=4,
+    seed=0,
+    isolate=False,
+    memory=False,
+    verbose=True,
+    **options,
+):
+    """
+    对每个(引擎, k, 特殊点模式)测量并统计运行时间
+
+    每种模式下的各个位置分别测量，所有样本合在一起统计，
+    同时给出各位置中位数的最小值和最大值，反映位置带来的差异。
+    memory为True时每个位置还在新的子进程中单独运行一次measure_memory，
+    不受前面测量抬高的RSS峰值影响，内存统计与运行时间写在同一行结果中。
+
+    :param engines: 引擎名列表，见engine_registry
+    :param k_values: k值列表
+    :param patterns: 特殊点模式列表，见workload_matrix
+    :param positions: edge、random模式各取的位置数
+    :param seed: 生成特殊点位置的随机数种子
+    :param isolate: 是否每组测量都在新的子进程中进行
+    :param memory: 是否同时测量内存占用
+    :param verbose: 是否逐行打印结果
+    :param options: 传给time_engine的其他参数
+    :return: 结果列表，每项为dict
+    """
+    measure = time_engine_isolated if isolate else time_engine
+    results = []
+    for engine in engines:
+        for k in k_values:
+            matrix = workload_matrix(k, patterns, positions, seed)
+            for pattern, cells in matrix.items():
+                samples = []
+                medians = []
+                profiles = []
+                for x, y in cells:
+                    cell_samples = measure(engine, k, x, y, **options)
+                    samples.extend(cell_samples)
+                    medians.append(summarize(cell_samples)["median"])
+                    if memory:
+                        profiles.append(measure_memory_isolated(engine, k, x, y))
+                row = {"engine": engine, "k": k, "pattern": pattern}
+                row["positions"] = len(cells)
+                row.update(summarize(samples))
+                row["position_median_min"] = min(medians)
+                row["position_median_max"] = max(medians)
+                if memory:
+                    row.update(_summarize_memory(profiles, 4**k))
+                results.append(row)
+                if verbose:
+                    print_row(row)
+    return results
+
+
+def print_row(row):
+    """
+    打印一行测量结果
+
+    :param row: run_benchmark结果中的一项
+    :return: None
+    """
+    print(
+        f"{row['engine']} k={row['k']} {row['pattern']}: "
+        f"中位数 {row['median']:.6f} 秒, IQR {row['iqr']:.6f}, "
+        f"95% CI [{row['ci_low']:.6f}, {row['ci_high']:.6f}], n={row['n']}"
+    )
+    if "tracemalloc_peak_median" in row:
+        print(
+            f"    内存峰值 {row['tracemalloc_peak_median']} 字节, "
+            f"每格 {row['bytes_per_cell']:.2f} 字节, "
+            f"首次(含建表) {row['tracemalloc_cold_peak_max']} 字节, "
+            f"RSS峰值增长 {row['rss_growth_max']} 字节"
+        )
+    if "speedup" in row:
+        print(f"    相对{row['baseline']}的加速比 {row['speedup']:.2f}")
+
+
+def add_speedup(results, baseline):
+    """
+    给每行加上相对同一(k, 模式)下基准引擎中位数的加速比
+
+    :param results: run_benchmark的结果
+    :param baseline: 基准引擎名
+    :return: results，每行增加"baseline"和"speedup"
+    """
+    medians = {
+        (row["k"], row["pattern"]): row["median"]
+        for row in results
+        if row["engine"] == baseline
+    }
+    for row in results:
+        row["baseline"] = baseline
+        row["speedup"] = medians[row["k"], row["pattern"]] / row["median"]
+    return results
+
+
+def compare_int_kernel(k_values=range(1, 11), patterns=PATTERNS, **options):
+    """
+    对比浮点坐标的fill与整数位运算的fill_int
+
+    默认只测到k=10，全部模式下总共几分钟。递归的fill每大一级慢4倍以上，
+    k=11时一次约10秒，k=14时一次约10分钟，更大的k应只取一种模式并只测一次，例如
+    compare_int_kernel(range(11, 15), patterns=("corner",), warmup=0, min_repeats=1)
+
+    :param k_values: 要测试的k值
+    :param patterns: 特殊点位置模式
+    :param options: 传给run_benchmark的其他参数
+    :return: run_benchmark的结果，speedup为相对fill的加速比
+    """
+    options.setdefault("verbose", False)
+    results = run_benchmark(
+        engines=("recursive", "integer"),
+        k_values=k_values,
+        patterns=patterns,
+        **options,
+    )
+    return add_speedup(results, "recursive")
+
+
+def compare_lut_blocks(
+    k_values=range(6, 13), blocks=(2, 4, 8), patterns=PATTERNS, **options
+):
+    """
+    对比不同查表区块边长下fill_lut相对fill_int的运行时间
+
+    :param k_values: 要测试的k值
+    :param blocks: 要测试的查表区块边长
+    :param patterns: 特殊点位置模式
+    :param options: 传给run_benchmark的其他参数
+    :return: run_benchmark的结果，speedup为相对fill_int的加速比
+    """
+    engines = [
+        register_engine("lut%d" % block, "game_0_6", "Board", "fill_lut", block=block)
+        for block in blocks
+    ]
+    options.setdefault("verbose", False)
+    results = run_benchmark(
+        engines=("integer", *engines), k_values=k_values, patterns=patterns, **options
+    )
+    return add_speedup(results, "integer")
+
+
+def parallel_scaling_report(
+    k, max_workers=None, levels=2, engine="fill_stack", patterns=PATTERNS, **options
+):
+    """
+    测量fill_parallel在1..max_workers个进程下的运行时间
+
+    :param k: 棋盘大小的指数
+    :param max_workers: 最大进程数，默认为CPU核数
+    :param levels: 在主进程中展开的层数
+    :param engine: 子进程使用的串行填充方法名
+    :param patterns: 特殊点位置模式
+    :param options: 传给run_benchmark的其他参数
+    :return: run_benchmark的结果，speedup为相对1个进程的加速比
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    engines = [
+        register_engine(
+            "parallel%d" % workers,
+            "game_0_6",
+            "Board",
+            "fill_parallel",
+            workers=workers,
+            levels=levels,
+            engine=engine,
+        )
+        for workers in range(1, max_workers + 1)
+    ]
+    options.setdefault("verbose", False)
+    results = run_benchmark(
+        engines=engines, k_values=(k,), patterns=patterns, **options
+    )
+    return add_speedup(results, engines[0])
+
+
+def _summarize_memory(profiles, cells):
+    """
+    统计一种模式下各位置的内存占用
+
+    RSS只统计本次运行使RSS峰值增长了多少。在已经运行过其他测量的进程中，
+    低于旧峰值的部分看不出来，只是下界，所以run_benchmark总在新的子进程中测量。
+
+    :param profiles: measure_memory的结果列表
+    :param cells: 棋盘格子数
+    :return: dict，稳定状态下tracemalloc峰值的中位数和最大值、每格字节数、
+        第一次求解（含建表）峰值的最大值、RSS峰值增长的最大值
+    """
+    peaks = sorted(p["tracemalloc_peak"] for p in profiles)
+    growth = [
+        p["rss_peak"] - p["rss_before"] for p in profiles if p["rss_peak"] is not None
+    ]
+    median = _quantile(peaks, 0.5)
+    return {
+        "tracemalloc_peak_median": median,
+        "tracemalloc_peak_max": peaks[-1],
+        "bytes_per_cell": median / cells,
+        "tracemalloc_cold_peak_max": max(p["tracemalloc_cold_peak"] for p in profiles),
+        "rss_growth_max": max(growth) if growth else None,
+    }
+
+
+def write_json(results, filename):
+    """
+    把结果保存为JSON
+
+    :param results: run_benchmark的结果
+    :param filename: 文件名
+    :return: None
+    """
+    with open(filename, "w") as file:
+        json.dump(results, file, indent=2)
+
+
+def write_csv(results, filename):
+    """
+    把结果保存为CSV
+
+    :param results: run_benchmark的结果
+    :param filename: 文件名
+    :return: None
+    """
+    fields = list(results[0]) if results else []
+    with open(filename, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def plot_results(results, filename):
+    """
+    把每个引擎、每种模式的中位数时间随k变化的曲线画到文件，不需要图形界面
+
+    :param results: run_benchmark的结果
+    :param filename: 图片文件名，格式由扩展名决定
+    :return: None
+    """
+    plt = get_pyplot(filename)
+    curves = {}
+    for row in results:
+        curve = curves.setdefault((row["engine"], row["pattern"]), ([], [], [], []))
+        curve[0].append(row["k"])
+        curve[1].append(row["median"])
+        curve[2].append(row["median"] - row["ci_low"])
+        curve[3].append(row["ci_high"] - row["median"])
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for (engine, pattern), (ks, medians, low, high) in curves.items():
+        ax.errorbar(
+            ks, medians, yerr=[low, high], marker="o", label=f"{engine} {pattern}"
+        )
+    ax.set_yscale("log")
+    ax.set_xlabel("k (棋盘大小为 2^k)")
+    ax.set_ylabel("运行时间中位数 (秒)")
+    ax.grid(True)
+    ax.legend()
+    show_or_save(plt, filename)
+
+
+def main(argv=None):
+    """
+    命令行入口：python -m benchmark bench [选项]
+
+    求解只需要NumPy，只有给出--plot时才导入matplotlib，且不弹出窗口。
+
+    :param argv: 命令行参数列表，默认取sys.argv[1:]
+    :return: None
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench", help="测量各引擎的运行时间")
+    bench.add_argument(
+        "--engines",
+        nargs="+",
+        default=["Board", "OptimizedBoard"],
+        help="引擎名: " + ", ".join(engine_registry()),
+    )
+    bench.add_argument("--k", nargs="+", type=int, default=list(range(1, 13)))
+    bench.add_argument("--patterns", nargs="+", default=list(PATTERNS))
+    bench.add_argument("--positions", type=int, default=4)
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--min-time", type=float, default=0.5)
+    bench.add_argument(
+        "--isolate", action="store_true", help="每组测量在新的子进程中进行"
+    )
+    bench.add_argument("--memory", action="store_true", help="同时测量内存占用")
+    bench.add_argument("--json", help="把结果保存为JSON文件")
+    bench.add_argument("--csv", help="把结果保存为CSV文件")
+    bench.add_argument("--plot", help="把结果曲线保存为图片文件")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(
+        engines=args.engines,
+        k_values=args.k,
+        patterns=args.patterns,
+        positions=args.positions,
+        seed=args.seed,
+        isolate=args.isolate,
+        memory=args.memory,
+        min_time=args.min_time,
+    )
+    if args.json:
+        write_json(results, args.json)
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.plot:
+        plot_results(results, args.plot)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import tkinter as tk
 from tkinter import messagebox
 import time  # 导入时间模块
+from gui_common import get_cache, show_board
 
 
 class Board:
@@ -25,9 +25,7 @@ class Board:
         可视化函数
         :return: None
         """
-        plt.imshow(self.board, cmap=plt.cm.gray)
-        plt.colorbar()
-        plt.show()
+        show_board(self.board)
 
     def fill_block(self, x, y):
         """
@@ -86,29 +84,31 @@ def on_start_button_click():
         if loc_x < 0 or loc_y < 0 or loc_x >= 2**k or loc_y >= 2**k:
             raise ValueError("特殊点坐标超出棋盘范围")
 
-        # 边长
-        side = 2**k
-        # 实例化对象
-        board = Board(side, loc_x, loc_y)
+        cache = get_cache()
+        misses = cache.misses
 
         # 记录开始时间
         start_time = time.time()
 
-        # 递归填充
-        board.fill(0, 0, side, loc_x, loc_y)
+        # 取缓存的结果，未命中时才递归填充
+        labels = cache.get(k, loc_x, loc_y)
 
         # 记录结束时间
         end_time = time.time()
 
-        # 计算并显示运行时间
+        # 只有真正求解时才是填充时间，命中缓存时注明
         elapsed_time = end_time - start_time
-        print(f"程序运行时间: {elapsed_time:.12f} 秒")
+        if cache.misses > misses:
+            message = f"运行时间: {elapsed_time:.12f} 秒"
+        else:
+            message = f"缓存结果，读取时间: {elapsed_time:.12f} 秒"
+        print(message)
 
         # 可视化
-        board.visualize()
+        show_board(labels)
 
         # 显示提示框
-        messagebox.showinfo("成功", f"棋盘填充完成！\n运行时间: {elapsed_time:.12f} 秒")
+        messagebox.showinfo("成功", f"棋盘填充完成！\n{message}")
 
     except ValueError as e:
         messagebox.showerror("输入错误", f"输入无效: {str(e)}")
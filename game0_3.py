@@ -1,9 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import tkinter as tk
-from tkinter import messagebox
 import time
 
+from plotting import get_pyplot, show_or_save
+
 
 class Board:
     def __init__(self, side, x, y):
@@ -25,6 +24,8 @@ class Board:
         可视化函数
         :return: None
         """
+        import matplotlib.pyplot as plt
+
         plt.imshow(self.board, cmap=plt.cm.gray)
         plt.colorbar()
         plt.show()
@@ -108,22 +109,26 @@ def collect_data():
     return k_values, avg_times
 
 
-def plot_data(k_values, avg_times):
+def plot_data(k_values, avg_times, filename=None):
     """
     绘制 k 值和对应平均运行时间的图表
     :param k_values: k 值
     :param avg_times: 对应的平均运行时间
+    :param filename: 给出时把图表保存到该文件，不弹出窗口
     """
+    plt = get_pyplot(filename)
+
     plt.plot(k_values, avg_times, marker="o")
     plt.title("棋盘覆盖问题的运行时间（每个 k 执行 10 次）")
     plt.xlabel("k (棋盘大小为 2^k)")
     plt.ylabel("平均运行时间（秒）")
     plt.grid(True)
-    plt.show()
+    show_or_save(plt, filename)
 
 
-# 收集实验数据
-k_values, avg_times = collect_data()
+if __name__ == "__main__":
+    # 收集实验数据
+    k_values, avg_times = collect_data()
 
-# 绘制图表
-plot_data(k_values, avg_times)
+    # 绘制图表
+    plot_data(k_values, avg_times)
@@ -1,7 +1,7 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import tkinter as tk
 from tkinter import messagebox
+from gui_common import get_cache, show_board
 
 
 class Board:
@@ -24,9 +24,7 @@ class Board:
         可视化函数
         :return: None
         """
-        plt.imshow(self.board, cmap=plt.cm.gray)
-        plt.colorbar()
-        plt.show()
+        show_board(self.board)
 
     def fill_block(self, x, y):
         """
@@ -85,14 +83,10 @@ def on_start_button_click():
         if loc_x < 0 or loc_y < 0 or loc_x >= 2**k or loc_y >= 2**k:
             raise ValueError("特殊点坐标超出棋盘范围")
 
-        # 边长
-        side = 2**k
-        # 实例化对象
-        board = Board(side, loc_x, loc_y)
-        # 递归填充
-        board.fill(0, 0, side, loc_x, loc_y)
+        # 取缓存的结果，未命中时才递归填充
+        labels = get_cache().get(k, loc_x, loc_y)
         # 可视化
-        board.visualize()
+        show_board(labels)
 
         # 显示提示框
         messagebox.showinfo("成功", "棋盘填充完成！")
@@ -1,9 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import tkinter as tk
-from tkinter import messagebox
 import time
 
+from plotting import get_pyplot, show_or_save
+
 
 class Board:
     def __init__(self, side, x, y):
@@ -25,6 +24,8 @@ class Board:
         可视化函数
         :return: None
         """
+        import matplotlib.pyplot as plt
+
         plt.imshow(self.board, cmap=plt.cm.gray)
         plt.colorbar()
         plt.show()
@@ -151,13 +152,18 @@ def collect_data(board_class):
     return k_values, avg_times
 
 
-def plot_comparison_data(k_values, avg_times_original, avg_times_optimized):
+def plot_comparison_data(
+    k_values, avg_times_original, avg_times_optimized, filename=None
+):
     """
     绘制优化前后对比图
     :param k_values: k 值
     :param avg_times_original: 原始版本的平均运行时间
     :param avg_times_optimized: 优化版本的平均运行时间
+    :param filename: 给出时把图表保存到该文件，不弹出窗口
     """
+    plt = get_pyplot(filename)
+
     plt.plot(k_values, avg_times_original, marker="o", label="原始版本")
     plt.plot(k_values, avg_times_optimized, marker="o", label="优化版本")
     plt.title("棋盘覆盖问题的运行时间对比")
@@ -165,28 +171,33 @@ def plot_comparison_data(k_values, avg_times_original, avg_times_optimized):
     plt.ylabel("平均运行时间（秒）")
     plt.grid(True)
     plt.legend()
-    plt.show()
-
-
-# 收集原始版本的数据
-k_values, avg_times_original = collect_data(Board)
-
-# 收集优化版本的数据
-_, avg_times_optimized = collect_data(OptimizedBoard)
-
-# 绘制优化前后对比图
-plot_comparison_data(k_values, avg_times_original, avg_times_optimized)
-
-# 计算优化提升的百分比
-improvement_percentages = [
-    (
-        ((avg_times_original[i] - avg_times_optimized[i]) / avg_times_original[i] * 100)
-        if avg_times_original[i] > 0
-        else 0
-    )  # 如果原始时间为 0，则提升百分比为 0
-    for i in range(len(k_values))
-]
-
-# 输出提升百分比
-for k, improvement in zip(k_values, improvement_percentages):
-    print(f"k={k}: 提升 {improvement:.2f}%")
+    show_or_save(plt, filename)
+
+
+if __name__ == "__main__":
+    # 收集原始版本的数据
+    k_values, avg_times_original = collect_data(Board)
+
+    # 收集优化版本的数据
+    _, avg_times_optimized = collect_data(OptimizedBoard)
+
+    # 绘制优化前后对比图
+    plot_comparison_data(k_values, avg_times_original, avg_times_optimized)
+
+    # 计算优化提升的百分比
+    improvement_percentages = [
+        (
+            (
+                (avg_times_original[i] - avg_times_optimized[i])
+                / avg_times_original[i]
+                * 100
+            )
+            if avg_times_original[i] > 0
+            else 0
+        )  # 如果原始时间为 0，则提升百分比为 0
+        for i in range(len(k_values))
+    ]
+
+    # 输出提升百分比
+    for k, improvement in zip(k_values, improvement_percentages):
+        print(f"k={k}: 提升 {improvement:.2f}%")
@@ -1,9 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import tkinter as tk
-from tkinter import messagebox
 import time
 
+from plotting import get_pyplot, show_or_save
+
 
 class Board:
     def __init__(self, side, x, y):
@@ -25,6 +24,8 @@ class Board:
         可视化函数
         :return: None
         """
+        import matplotlib.pyplot as plt
+
         plt.imshow(self.board, cmap=plt.cm.gray)
         plt.colorbar()
         plt.show()
@@ -161,13 +162,16 @@ def run_experiment():
     return k_values, avg_times
 
 
-def plot_comparison(original_times, optimized_times, k_values):
+def plot_comparison(original_times, optimized_times, k_values, filename=None):
     """
     绘制对比图
     :param original_times: 原始算法的运行时间
     :param optimized_times: 优化算法的运行时间
     :param k_values: k值的列表
+    :param filename: 给出时把图表保存到该文件，不弹出窗口
     """
+    plt = get_pyplot(filename)
+
     plt.figure(figsize=(10, 6))
 
     # 绘制原始和优化算法的对比图
@@ -188,8 +192,7 @@ def plot_comparison(original_times, optimized_times, k_values):
     plt.legend()
     plt.grid(True)
 
-    # 显示图表
-    plt.show()
+    show_or_save(plt, filename)
 
 
 # 原始算法的实验
@@ -233,4 +236,5 @@ def main():
 
 
 # 运行主函数
-main()
+if __name__ == "__main__":
+    main()
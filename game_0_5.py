@@ -1,7 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import time
 
+from plotting import get_pyplot, show_or_save
+
 
 class Board:
     def __init__(self, side, x, y):
@@ -177,13 +178,16 @@ def run_original_experiment():
     return k_values, avg_times
 
 
-def plot_comparison(original_times, optimized_times, k_values):
+def plot_comparison(original_times, optimized_times, k_values, filename=None):
     """
     绘制对比图并记录数据
     :param original_times: 原始算法的运行时间
     :param optimized_times: 优化算法的运行时间
     :param k_values: k值的列表
+    :param filename: 给出时把图表保存到该文件，不弹出窗口
     """
+    plt = get_pyplot(filename)
+
     plt.figure(figsize=(10, 6))
 
     # 绘制原始和优化算法的对比图
@@ -214,8 +218,7 @@ def plot_comparison(original_times, optimized_times, k_values):
     plt.legend()
     plt.grid(True)
 
-    # 显示图表
-    plt.show()
+    show_or_save(plt, filename)
 
 
 def main():
@@ -0,0 +1,2336 @@
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import shared_memory
+import os
+import time
+
+import numpy as np
+
+# 特殊点位于第q象限时，L型骨牌占据的另外三个象限
+_TROMINO_QUADS = np.array([[1, 2, 3], [0, 2, 3], [0, 1, 3], [0, 1, 2]])
+# fill_stack每积累这么多块骨牌就写回一次棋盘
+_FLUSH_TILES = 1 << 20
+# fill_stack中只记一条记录、写回时再查表展开的子区块边长
+_STACK_BASE = 16
+# fill_levels每层最多同时处理的区块数，超过就分批
+_LEVEL_CHUNK = 1 << 20
+# 四个子区块的象限编号及其行、列偏移（按fill的访问顺序）
+_QUADS = np.arange(4)
+_QUAD_X = np.array([0, 0, 1, 1])
+_QUAD_Y = np.array([0, 1, 0, 1])
+# 特殊点位于第q象限时：中心骨牌占据的三个象限，以及按fill访问顺序的四个象限
+_QUAD_TABLE = tuple(
+    (
+        tuple((i >> 1, i & 1) for i in range(4) if i != q),
+        tuple((i, i >> 1, i & 1) for i in range(4)),
+    )
+    for q in range(4)
+)
+# 解压缩时直接缓存并复制的模板最大边长指数，更大的模板继续拆成四个子区块
+_TEMPLATE_LEVEL = 8
+# solve_batch用逐层向量化核心一起处理整批棋盘的最大k，更大时逐个展开模板
+_BATCH_FRONTIER_LEVEL = 5
+# visualize最多显示的行、列数
+_VIEW_PIXELS = 2048
+# 正方形的8种对称变换：(是否交换行列, 是否上下翻转, 是否左右翻转)
+_SYMMETRIES = [(s, fx, fy) for s in (0, 1) for fx in (0, 1) for fy in (0, 1)]
+
+
+def _scatter_tiles(flat, tiles, t, n):
+    """
+    把fill_stack记录的骨牌一次性写入展平的棋盘
+
+    :param flat: 展平的棋盘
+    :param tiles: 骨牌记录，每项为中心左上格展平下标*4+特殊点象限
+    :param t: 第一块骨牌的标注
+    :param n: 棋盘边长
+    :return: 下一块骨牌的标注
+    """
+    codes = np.frombuffer(tiles, dtype=np.int64)
+    # 中心四格相对左上格的偏移，去掉特殊点所在象限那一格即为骨牌的三格
+    offsets = np.array([0, 1, n, n + 1])
+    cells = (codes >> 2)[:, None] + offsets[_TROMINO_QUADS[codes & 3]]
+    flat[cells] = np.arange(t, t + len(codes))[:, None]
+    return t + len(codes)
+
+
+def _paste_template(out, corner, templates, offset):
+    """
+    用四个半边长模板拼出特殊点在某个角上的区块
+
+    :param out: 写入的目标区块（可以是棋盘的切片视图）
+    :param corner: 特殊点所在的角，编号同象限：0左上 1右上 2左下 3右下
+    :param templates: 半边长的四个模板，下标为特殊点所在的角
+    :param offset: 加到相对标注上的偏移，中心骨牌为offset+1，特殊点为offset
+    :return: out
+    """
+    h = templates[0].shape[0]
+    count = _tile_count(h.bit_length() - 1)
+    for q in range(4):
+        # 特殊点所在象限沿用同一个角，其余象限的特殊点在靠近中心的角
+        sub = templates[corner if q == corner else 3 - q]
+        region = out[(q >> 1) * h : ((q >> 1) + 1) * h, (q & 1) * h : ((q & 1) + 1) * h]
+        np.add(sub, offset + 1 + q * count, out=region)
+    for q in range(4):
+        if q != corner:
+            out[h - 1 + (q >> 1), h - 1 + (q & 1)] = offset + 1
+    out[(corner >> 1) * (2 * h - 1), (corner & 1) * (2 * h - 1)] = offset
+    return out
+
+
+def label_dtype(side):
+    """
+    能放下边长为side的棋盘所有标注的最小无符号整数类型
+
+    :param side: 棋盘边长
+    :return: np.uint8 / np.uint16 / np.uint32 / np.uint64
+    """
+    # 最大的标注是特殊方块的 (side*side-1)/3+1
+    largest = (side * side - 1) // 3 + 1
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if largest <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def _fill_frontier(flat, n, side, t_x, t_y, d_x, d_y, t):
+    """
+    fill_levels的核心：从一组同样边长的区块开始逐层向量化填充
+
+    :param flat: 展平的棋盘，行宽为n
+    :param n: 棋盘行宽
+    :param side: 区块边长
+    :param t_x: 各区块左上角x数组
+    :param t_y: 各区块左上角y数组
+    :param d_x: 各区块特殊点x数组
+    :param d_y: 各区块特殊点y数组
+    :param t: 各区块第一块骨牌标注数组
+    :return: None
+    """
+    offsets = np.array([0, 1, n, n + 1])
+    work = [(side, t_x, t_y, d_x, d_y, t)]
+    while work:
+        size, t_x, t_y, d_x, d_y, t = work.pop()
+        while True:
+            half = size >> 1
+            c_x = t_x + (half - 1)
+            c_y = t_y + (half - 1)
+            q = (d_x > c_x) * 2 + (d_y > c_y)
+            cells = (c_x * n + c_y)[:, None] + offsets[_TROMINO_QUADS[q]]
+            flat[cells] = t[:, None]
+            if half == 1:
+                break
+            # 展开下一层的四个子区块
+            own = q[:, None] == _QUADS
+            d_x = np.where(own, d_x[:, None], c_x[:, None] + _QUAD_X).ravel()
+            d_y = np.where(own, d_y[:, None], c_y[:, None] + _QUAD_Y).ravel()
+            t_x = (t_x[:, None] + _QUAD_X * half).ravel()
+            t_y = (t_y[:, None] + _QUAD_Y * half).ravel()
+            count = _tile_count(half.bit_length() - 1)
+            t = (t[:, None] + 1 + _QUADS * count).ravel()
+            size = half
+            if len(t) > _LEVEL_CHUNK:
+                for i in range(_LEVEL_CHUNK, len(t), _LEVEL_CHUNK):
+                    s = slice(i, i + _LEVEL_CHUNK)
+                    work.append((size, t_x[s], t_y[s], d_x[s], d_y[s], t[s]))
+                s = slice(0, _LEVEL_CHUNK)
+                t_x, t_y, d_x, d_y, t = t_x[s], t_y[s], d_x[s], d_y[s], t[s]
+
+
+def _expand_blocks(tiles, table):
+    """
+    把fill_stack记录中代表整个小区块的负数记录展开成逐块骨牌的记录
+
+    :param tiles: fill_stack的记录
+    :param table: 小区块记录表，第d行为特殊点下标为d时各骨牌相对左上格的记录偏移
+    :return: 展开后的int64数组，顺序即标注顺序
+    """
+    codes = np.frombuffer(tiles, dtype=np.int64)
+    blocks = codes < 0
+    count, per = table.shape
+    sizes = np.where(blocks, per, 1)
+    starts = np.cumsum(sizes) - sizes
+    out = np.empty(int(sizes.sum()), dtype=np.int64)
+    out[starts[~blocks]] = codes[~blocks]
+    v = -1 - codes[blocks]
+    out[starts[blocks][:, None] + np.arange(per)] = (v // count * 4)[:, None] + table[
+        v % count
+    ]
+    return out
+
+
+@lru_cache(maxsize=None)
+def _stack_table(lvl):
+    """
+    fill_stack用的小区块记录表
+
+    :param lvl: 区块边长指数
+    :return: 按特殊点下标x*side+y排列，每项为按标注顺序的各骨牌(中心左上格x, y, 特殊点象限)
+    """
+    side = 1 << lvl
+    table = []
+    for d in range(side * side):
+        cells = []
+        for _, tromino, q in _iter_trominoes(lvl, divmod(d, side)):
+            cells.append((min(x for x, _ in tromino), min(y for _, y in tromino), q))
+        table.append(tuple(cells))
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def _stack_codes(lvl, n):
+    """
+    把_stack_table换算成边长n的棋盘上的骨牌编码(x*n+y)*4+q
+
+    :param lvl: 区块边长指数
+    :param n: 整个棋盘的边长
+    :return: (区块格数, 区块骨牌数)的只读int64数组
+    """
+    table = np.array(
+        [[(x * n + y) * 4 + q for x, y, q in tiles] for tiles in _stack_table(lvl)],
+        dtype=np.int64,
+    )
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=None)
+def _base_table(lvl):
+    """
+    边长2^lvl的区块在每个特殊点位置下的相对标注表
+
+    :param lvl: 边长指数
+    :return: (side, side, side, side)的只读数组，[d_x, d_y]为特殊点在(d_x, d_y)时的
+        区块标注，骨牌从1开始编号，特殊点为0
+    """
+    side = 1 << lvl
+    table = np.zeros((side, side, side, side), dtype=np.int64)
+    for d_x in range(side):
+        for d_y in range(side):
+            board = Board(side, d_x, d_y, dtype=np.int64)
+            board.fill_int(0, 0, side, d_x, d_y)
+            board.board[d_x, d_y] = 0
+            table[d_x, d_y] = board.board
+    table.flags.writeable = False
+    return table
+
+
+def _split_block(t_x, t_y, side, d_x, d_y, t):
+    """
+    展开一个区块：求出中心骨牌的三个格子和四个子区块
+
+    :param t_x: 区块左上角x
+    :param t_y: 区块左上角y
+    :param side: 区块边长
+    :param d_x: 区块特殊点坐标x
+    :param d_y: 区块特殊点坐标y
+    :param t: 区块第一块骨牌（即中心骨牌）的标注
+    :return: (中心骨牌的格子列表, 按fill访问顺序排列的子区块列表)，
+        子区块与参数同样为(t_x, t_y, side, d_x, d_y, t)
+    """
+    half = side >> 1
+    c_x = t_x + half - 1
+    c_y = t_y + half - 1
+    pos = (int(d_x > c_x), int(d_y > c_y))
+    count = _tile_count(half.bit_length() - 1)
+    cells = []
+    children = []
+    for q, (i, j) in enumerate([(0, 0), (0, 1), (1, 0), (1, 1)]):
+        sub = (t_x + i * half, t_y + j * half, half)
+        if (i, j) == pos:
+            children.append((*sub, d_x, d_y, t + 1 + q * count))
+        else:
+            cells.append((c_x + i, c_y + j))
+            children.append((*sub, c_x + i, c_y + j, t + 1 + q * count))
+    return cells, children
+
+
+def _fill_shared(name, shape, dtype, engine, task):
+    """
+    进程池任务：在共享内存棋盘上填充一个子区块
+
+    :param name: 共享内存名
+    :param shape: 棋盘形状
+    :param dtype: 棋盘元素类型
+    :param engine: Board的串行填充方法名
+    :param task: 子区块(t_x, t_y, side, d_x, d_y, t)
+    :return: None
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        board = Board._from_array(
+            np.ndarray(shape, dtype=dtype, buffer=shm.buf), task[5]
+        )
+        getattr(board, engine)(*task[:5])
+        del board
+    finally:
+        shm.close()
+
+
+class Board:
+    def __init__(self, side, x, y, filename=None, dtype=None):
+        """
+        初始化棋盘
+
+        :param side: 棋盘边长
+        :param x: 特殊点横坐标
+        :param y: 特殊点纵坐标
+        :param filename: 给出时棋盘存放在该.npy文件的内存映射中而不是内存里，
+            用于内存放不下的大棋盘，之后可用load_board按需读取
+        :param dtype: 棋盘元素类型，默认用label_dtype选能放下所有标注的最小类型
+        """
+        self.special_block = (x, y)
+        if dtype is None:
+            dtype = label_dtype(side)
+        if filename is None:
+            self.board = np.zeros((side, side), dtype=dtype)
+        else:
+            # 新建的文件内容全为0，不会一次性占用内存
+            self.board = np.lib.format.open_memmap(
+                filename, mode="w+", dtype=dtype, shape=(side, side)
+            )
+        self.board[x][y] = (side * side - 1) / 3 + 1
+        self.t = 1
+        self.side = side
+
+    @classmethod
+    def _from_array(cls, board, t):
+        """
+        用已有的数组构造棋盘对象，不经过__init__，避免再分配一块完整棋盘
+
+        :param board: 棋盘数组（共享内存、内存映射或临时数组）
+        :param t: 下一块骨牌的标注
+        :return: Board
+        """
+        obj = cls.__new__(cls)
+        obj.board = board
+        obj.side = board.shape[0]
+        obj.t = t
+        return obj
+
+    def visualize(self):
+        """
+        可视化函数
+        :return: None
+        """
+        import matplotlib.pyplot as plt
+
+        # 大棋盘只隔行隔列取样显示，内存映射的棋盘也只读取取样到的部分
+        step = max(1, self.side // _VIEW_PIXELS)
+        plt.imshow(self.board[::step, ::step], cmap=plt.cm.gray)
+        plt.colorbar()
+        plt.show()
+
+    def fill_block(self, x, y):
+        """
+        填充点(x, y)
+        :param x: x
+        :param y: y
+        :return: None
+        """
+        if self.board[x][y] == 0:
+            self.board[x][y] = self.t
+        else:
+            raise Exception
+
+    def solve(self, engine="recursive", **options):
+        """
+        用指定的引擎从左上角填充整个棋盘
+
+        :param engine: ENGINES中的引擎名
+        :param options: 传给引擎方法的其他参数
+        :return: None
+        """
+        x, y = self.special_block
+        getattr(self, ENGINES[engine])(0, 0, self.side, x, y, **options)
+
+    def move_defect(self, new_x, new_y):
+        """
+        把已填好的棋盘的特殊点移到(new_x, new_y)，只修改变化的格子
+
+        每个区块第一块骨牌的标注只由它在递归树中的位置决定，与特殊点无关。
+        从根往下比较新旧特殊点：在同一象限就只进入该象限；在不同象限时，
+        中心骨牌从旧特殊点象限的角换到新特殊点象限的角，其余两个象限不变，
+        再分别处理这两个象限（它们的新旧特殊点之一是靠近中心的角）。
+        只有这些路径上的格子会被改写，通常为O(side)量级。
+
+        :param new_x: 新特殊点横坐标
+        :param new_y: 新特殊点纵坐标
+        :return: 标注发生变化的格子集合{(x, y), ...}
+        """
+        if not (0 <= new_x < self.side and 0 <= new_y < self.side):
+            raise ValueError("特殊点坐标超出棋盘范围")
+        old_x, old_y = self.special_block
+        if (old_x, old_y) == (new_x, new_y):
+            return set()
+        special = self.board[old_x][old_y]
+        changed = set()
+        stack = [(0, 0, self.side, old_x, old_y, new_x, new_y, 1)]
+        while stack:
+            t_x, t_y, side, a_x, a_y, b_x, b_y, t = stack.pop()
+            while side > 1 and (a_x, a_y) != (b_x, b_y):
+                half = side >> 1
+                c_x = t_x + half - 1
+                c_y = t_y + half - 1
+                qa = (a_x > c_x) * 2 + (a_y > c_y)
+                qb = (b_x > c_x) * 2 + (b_y > c_y)
+                count = _tile_count(half.bit_length() - 1)
+                if qa != qb:
+                    # 旧特殊点象限的角并入中心骨牌，新特殊点象限的角交给子区块
+                    m_x = c_x + (qa >> 1)
+                    m_y = c_y + (qa & 1)
+                    self.board[m_x][m_y] = t
+                    changed.add((m_x, m_y))
+                    n_x = c_x + (qb >> 1)
+                    n_y = c_y + (qb & 1)
+                    stack.append(
+                        (
+                            t_x + (qb >> 1) * half,
+                            t_y + (qb & 1) * half,
+                            half,
+                            n_x,
+                            n_y,
+                            b_x,
+                            b_y,
+                            t + 1 + qb * count,
+                        )
+                    )
+                    b_x, b_y = m_x, m_y
+                t += 1 + qa * count
+                t_x += (qa >> 1) * half
+                t_y += (qa & 1) * half
+                side = half
+        self.board[new_x][new_y] = special
+        changed.add((new_x, new_y))
+        self.special_block = (new_x, new_y)
+        return changed
+
+    def fill(self, t_x, t_y, side, d_x, d_y):
+        """
+        递归函数填充棋盘或子棋盘（下文称区块)
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param side: 区块边长
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :return: None
+        """
+        if side == 1:
+            return
+        pos = (round((d_x - t_x + 1) / side), round((d_y - t_y + 1) / side))
+        center = (round(t_x + side / 2 - 1), round(t_y + side / 2 - 1))
+        ls = [(0, 0), (0, 1), (1, 0), (1, 1)]
+        for i in ls:
+            if i != pos:
+                x = center[0] + i[0]
+                y = center[1] + i[1]
+                self.fill_block(x, y)
+        self.t += 1
+        for i in ls:
+            if i != pos:
+                x = center[0] + i[0]
+                y = center[1] + i[1]
+                x1 = t_x + i[0] * (side / 2)
+                y1 = t_y + i[1] * (side / 2)
+                self.fill(x1, y1, side / 2, x, y)
+            else:
+                x1 = t_x + i[0] * (side / 2)
+                y1 = t_y + i[1] * (side / 2)
+                self.fill(x1, y1, side / 2, d_x, d_y)
+
+    def fill_int(self, t_x, t_y, side, d_x, d_y):
+        """
+        整数递归填充棋盘（与fill参数相同，标注结果完全一致）
+
+        递归结构与fill相同，但只用整数移位和按位运算：
+        象限为((d_x - t_x) >> lvl, (d_y - t_y) >> lvl)，半边长为1 << lvl，
+        中心骨牌的三个象限和子区块顺序查预先算好的_QUAD_TABLE，
+        不再产生浮点坐标，也不再用浮点数做NumPy下标。
+
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param side: 区块边长
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :return: None
+        """
+        side = int(side)
+        self._fill_int(int(t_x), int(t_y), side.bit_length() - 1, int(d_x), int(d_y))
+
+    def _fill_int(self, t_x, t_y, lvl, d_x, d_y):
+        """
+        fill_int的递归体
+
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param lvl: 区块边长的指数
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :return: None
+        """
+        if lvl == 0:
+            return
+        lvl -= 1
+        c_x = t_x + (1 << lvl) - 1
+        c_y = t_y + (1 << lvl) - 1
+        q = ((d_x - t_x) >> lvl) << 1 | ((d_y - t_y) >> lvl)
+        tromino, quads = _QUAD_TABLE[q]
+        for i, j in tromino:
+            self.fill_block(c_x + i, c_y + j)
+        self.t += 1
+        for p, i, j in quads:
+            if p == q:
+                self._fill_int(t_x + (i << lvl), t_y + (j << lvl), lvl, d_x, d_y)
+            else:
+                self._fill_int(
+                    t_x + (i << lvl), t_y + (j << lvl), lvl, c_x + i, c_y + j
+                )
+
+    def fill_lut(self, t_x, t_y, side, d_x, d_y, block=4):
+        """
+        查表收尾的递归填充棋盘（与fill参数相同，标注结果完全一致）
+
+        递归结构同fill_int，但区块边长不超过block时不再递归，
+        而是按(边长, 区块内特殊点位置)查预先算好的相对标注表，
+        加上标注偏移后一次切片写入。block为4或8时Python调用次数减少16~64倍。
+
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param side: 区块边长
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :param block: 查表的最大区块边长
+        :return: None
+        """
+        side = int(side)
+        self._fill_lut(
+            int(t_x), int(t_y), side.bit_length() - 1, int(d_x), int(d_y), block
+        )
+
+    def _fill_lut(self, t_x, t_y, lvl, d_x, d_y, block):
+        """
+        fill_lut的递归体
+
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param lvl: 区块边长的指数
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :param block: 查表的最大区块边长
+        :return: None
+        """
+        if lvl == 0:
+            return
+        size = 1 << lvl
+        if size <= block:
+            # 表中特殊点的相对标注为0，写入后恢复特殊点原有的值
+            region = self.board[t_x : t_x + size, t_y : t_y + size]
+            special = region[d_x - t_x, d_y - t_y]
+            region[...] = _base_table(lvl)[d_x - t_x, d_y - t_y] + (self.t - 1)
+            region[d_x - t_x, d_y - t_y] = special
+            self.t += _tile_count(lvl)
+            return
+        lvl -= 1
+        c_x = t_x + (1 << lvl) - 1
+        c_y = t_y + (1 << lvl) - 1
+        q = ((d_x - t_x) >> lvl) << 1 | ((d_y - t_y) >> lvl)
+        tromino, quads = _QUAD_TABLE[q]
+        for i, j in tromino:
+            self.fill_block(c_x + i, c_y + j)
+        self.t += 1
+        for p, i, j in quads:
+            x = t_x + (i << lvl)
+            y = t_y + (j << lvl)
+            if p == q:
+                self._fill_lut(x, y, lvl, d_x, d_y, block)
+            else:
+                self._fill_lut(x, y, lvl, c_x + i, c_y + j, block)
+
+    def fill_stack(self, t_x, t_y, side, d_x, d_y):
+        """
+        显式栈填充棋盘（与fill参数相同，标注结果完全一致）
+
+        用列表模拟递归调用栈，栈中只存放整数记录(t_x, t_y, side, d_x, d_y)，
+        按(1,1),(1,0),(0,1),(0,0)的逆序入栈，出栈顺序即fill的深度优先顺序，
+        因此self.t的分配顺序不变，也不会受递归深度限制。
+        边长为_STACK_BASE的子区块不入栈，在父区块中只记一条记录，
+        写回棋盘时再按特殊点位置查表展开成全部骨牌。
+        为了速度不再逐格检查重叠，需要时可用validate_tiling事后校验。
+
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param side: 区块边长
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :return: None
+        """
+        t_x, t_y, side, d_x, d_y = (int(v) for v in (t_x, t_y, side, d_x, d_y))
+        if side == 1:
+            return
+        n = self.side
+        # 每块骨牌只记录一个整数：中心左上格的展平下标*4+特殊点所在象限，
+        # 标注就是记录的顺序，分批向量化写回棋盘
+        flat = self.board.reshape(-1)
+        t = self.t
+        if side <= _STACK_BASE:
+            cells = _stack_table(side.bit_length() - 1)[(d_x - t_x) * side + d_y - t_y]
+            tiles = array("q", [((t_x + x) * n + t_y + y) * 4 + q for x, y, q in cells])
+            self.t = _scatter_tiles(flat, tiles, t, n)
+            return
+        base = _STACK_BASE
+        cells = base * base
+        # 边长base的子区块记为负数 -(1+左上格展平下标*base^2+特殊点在区块内的下标)
+        table = _stack_codes(base.bit_length() - 1, n)
+        limit = max(1, _FLUSH_TILES // table.shape[1])
+        tiles = array("q")
+        record = tiles.append
+        stack = [(t_x, t_y, side, d_x, d_y)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            t_x, t_y, side, d_x, d_y = pop()
+            half = side >> 1
+            # 中心四格中左上角的一格
+            c_x = t_x + half - 1
+            c_y = t_y + half - 1
+            # 特殊点所在象限编号：0左上 1右上 2左下 3右下
+            q = (d_x > c_x) * 2 + (d_y > c_y)
+            record((c_x * n + c_y) * 4 + q)
+            m_x = c_x + 1
+            m_y = c_y + 1
+            # 缓冲区满了就先写回棋盘，限制大k时的内存占用
+            if len(tiles) >= limit:
+                t = _scatter_tiles(flat, _expand_blocks(tiles, table), t, n)
+                del tiles[:]
+            if half == base:
+                # 不含特殊点的子区块，特殊点在靠近中心的角上
+                if q == 0:
+                    record(
+                        -1 - ((t_x * n + t_y) * cells + (d_x - t_x) * base + d_y - t_y)
+                    )
+                else:
+                    record(-1 - ((t_x * n + t_y) * cells + cells - 1))
+                if q == 1:
+                    record(
+                        -1 - ((t_x * n + m_y) * cells + (d_x - t_x) * base + d_y - m_y)
+                    )
+                else:
+                    record(-1 - ((t_x * n + m_y) * cells + cells - base))
+                if q == 2:
+                    record(
+                        -1 - ((m_x * n + t_y) * cells + (d_x - m_x) * base + d_y - t_y)
+                    )
+                else:
+                    record(-1 - ((m_x * n + t_y) * cells + base - 1))
+                if q == 3:
+                    record(
+                        -1 - ((m_x * n + m_y) * cells + (d_x - m_x) * base + d_y - m_y)
+                    )
+                else:
+                    record(-1 - (m_x * n + m_y) * cells)
+                continue
+            # 逆序入栈，子区块特殊点为原特殊点或中心对应的格子
+            if q == 3:
+                push((m_x, m_y, half, d_x, d_y))
+            else:
+                push((m_x, m_y, half, m_x, m_y))
+            if q == 2:
+                push((m_x, t_y, half, d_x, d_y))
+            else:
+                push((m_x, t_y, half, m_x, c_y))
+            if q == 1:
+                push((t_x, m_y, half, d_x, d_y))
+            else:
+                push((t_x, m_y, half, c_x, m_y))
+            if q == 0:
+                push((t_x, t_y, half, d_x, d_y))
+            else:
+                push((t_x, t_y, half, c_x, c_y))
+        self.t = _scatter_tiles(flat, _expand_blocks(tiles, table), t, n)
+
+    def fill_levels(self, t_x, t_y, side, d_x, d_y):
+        """
+        逐层向量化填充棋盘（与fill参数相同，标注结果完全一致）
+
+        同一递归层的4^j个区块一起处理：所有中心骨牌的位置、象限和标注都用
+        数组运算求出，再用花式索引一次写入，每层只需常数次NumPy调用。
+        子区块的标注直接由 父区块标注+1+q*(4^(j-1)-1)/3 算出，
+        所以各区块的处理顺序无关紧要；区块过多时分批处理以限制内存。
+
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param side: 区块边长
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :return: None
+        """
+        side = int(side)
+        if side == 1:
+            return
+        root = [np.array([int(v)]) for v in (t_x, t_y, d_x, d_y, self.t)]
+        _fill_frontier(self.board.reshape(-1), self.side, side, *root)
+        self.t += _tile_count(side.bit_length() - 1)
+
+    def fill_template(self, t_x, t_y, side, d_x, d_y):
+        """
+        模板拼贴填充棋盘（与fill参数相同，标注结果完全一致）
+
+        每层不含特殊点的三个象限，特殊点都在靠近中心的角上，只由边长和角决定。
+        因此每种边长、每个角只求一次相对标注的模板，再整块复制并加上标注偏移；
+        只有真正含特殊点的那条路径需要逐层处理。
+        旋转后的模板骨牌形状相同但深度优先标注顺序不同，所以四个角各存一份。
+        路径从下往上处理，只保留一种边长的模板，额外内存约为棋盘的1/4。
+
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param side: 区块边长
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :return: None
+        """
+        t_x, t_y, side, d_x, d_y = (int(v) for v in (t_x, t_y, side, d_x, d_y))
+        if side == 1:
+            return
+        # 先求出含特殊点的那条路径上每个区块的位置和第一块骨牌标注
+        path = []
+        t = self.t
+        size = side
+        while size > 1:
+            half = size >> 1
+            q_x = int(d_x >= t_x + half)
+            q_y = int(d_y >= t_y + half)
+            path.append((t_x, t_y, size, q_x * 2 + q_y, t))
+            t += 1 + (q_x * 2 + q_y) * _tile_count(half.bit_length() - 1)
+            t_x += q_x * half
+            t_y += q_y * half
+            size = half
+        # 边长1的模板就是特殊点本身，相对标注为0
+        templates = [np.zeros((1, 1), dtype=self.board.dtype)] * 4
+        for t_x, t_y, size, q, t in reversed(path):
+            half = size >> 1
+            if half > 1:
+                # 子象限边长为half，由边长half/2的模板拼成
+                if templates[0].shape[0] < half >> 1:
+                    templates = [
+                        _paste_template(
+                            np.empty((half >> 1, half >> 1), dtype=self.board.dtype),
+                            corner,
+                            templates,
+                            0,
+                        )
+                        for corner in range(4)
+                    ]
+                for i in range(4):
+                    if i != q:
+                        x = t_x + (i >> 1) * half
+                        y = t_y + (i & 1) * half
+                        region = self.board[x : x + half, y : y + half]
+                        offset = t + i * _tile_count(half.bit_length() - 1)
+                        _paste_template(region, 3 - i, templates, offset)
+            # 最后写本区块的中心骨牌，覆盖三个象限模板中的特殊点
+            for i in range(4):
+                if i != q:
+                    self.board[t_x + half - 1 + (i >> 1), t_y + half - 1 + (i & 1)] = t
+        self.t += _tile_count(side.bit_length() - 1)
+
+    def fill_parallel(
+        self, t_x, t_y, side, d_x, d_y, workers=None, levels=1, engine="fill_stack"
+    ):
+        """
+        多进程并行填充棋盘（与fill参数相同，标注结果完全一致）
+
+        先在主进程放好最上面levels层的中心骨牌，得到4^levels个互不相交的子区块，
+        每个子区块的第一块骨牌标注可以直接算出，再交给进程池，
+        各进程用engine指定的串行方法写入同一块共享内存棋盘。
+
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param side: 区块边长
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :param workers: 进程数，默认为CPU核数
+        :param levels: 在主进程中展开的层数，1层得到4个子区块，2层得到16个
+        :param engine: 子进程使用的串行填充方法名
+        :return: None
+        """
+        side = int(side)
+        if side >> levels < 2:
+            getattr(self, engine)(t_x, t_y, side, d_x, d_y)
+            return
+        shm = shared_memory.SharedMemory(create=True, size=self.board.nbytes)
+        try:
+            board = np.ndarray(self.board.shape, dtype=self.board.dtype, buffer=shm.buf)
+            board[...] = self.board
+            tasks = [(int(t_x), int(t_y), side, int(d_x), int(d_y), self.t)]
+            for _ in range(levels):
+                children = []
+                for task in tasks:
+                    cells, sub = _split_block(*task)
+                    for x, y in cells:
+                        board[x, y] = task[5]
+                    children.extend(sub)
+                tasks = children
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                jobs = [
+                    pool.submit(
+                        _fill_shared,
+                        shm.name,
+                        self.board.shape,
+                        self.board.dtype,
+                        engine,
+                        task,
+                    )
+                    for task in tasks
+                ]
+                for job in jobs:
+                    job.result()
+            self.board[...] = board
+            # 先释放视图再关闭共享内存
+            del board
+        finally:
+            shm.close()
+            shm.unlink()
+        self.t += _tile_count(side.bit_length() - 1)
+
+    def fill_blocks(self, t_x, t_y, side, d_x, d_y, block=2048):
+        """
+        分块填充棋盘（与fill参数相同，标注结果完全一致），用于内存映射的大棋盘
+
+        先放好上面几层的中心骨牌，直到子区块边长不超过block，
+        再按fill的访问顺序逐个在内存中的临时棋盘上用fill_template求解，
+        整块写回并刷新到文件，常驻内存只有一个block*block的临时棋盘。
+
+        :param t_x: 区块左上角x
+        :param t_y: 区块左上角y
+        :param side: 区块边长
+        :param d_x: 区块特殊点坐标x
+        :param d_y: 区块特殊点坐标y
+        :param block: 每次在内存中求解的子区块边长
+        :return: None
+        """
+        side = int(side)
+        tasks = [(int(t_x), int(t_y), side, int(d_x), int(d_y), self.t)]
+        while tasks[0][2] > block:
+            children = []
+            for task in tasks:
+                cells, sub = _split_block(*task)
+                for x, y in cells:
+                    self.board[x, y] = task[5]
+                children.extend(sub)
+            tasks = children
+        scratch = None
+        for t_x, t_y, size, d_x, d_y, t in tasks:
+            if scratch is None:
+                scratch = Board._from_array(np.empty((size, size), self.board.dtype), t)
+            scratch.t = t
+            scratch.fill_template(0, 0, size, d_x - t_x, d_y - t_y)
+            region = self.board[t_x : t_x + size, t_y : t_y + size]
+            # 特殊点已由上层骨牌或__init__写好，临时棋盘中该格未定义
+            special = region[d_x - t_x, d_y - t_y]
+            region[...] = scratch.board
+            region[d_x - t_x, d_y - t_y] = special
+            if isinstance(self.board, np.memmap):
+                self.board.flush()
+        self.t += _tile_count(side.bit_length() - 1)
+
+
+class MortonBoard:
+    def __init__(self, side, x, y, dtype=None):
+        """
+        初始化按Morton(Z)顺序存放的棋盘
+
+        格子(x, y)存放在下标 morton_index(x, y) 处，即x、y的二进制位交错排列，
+        与fill访问象限的顺序(0,0),(0,1),(1,0),(1,1)相同，
+        所以任意一层的任意子区块都是self.board中连续的一段。
+
+        :param side: 棋盘边长
+        :param x: 特殊点横坐标
+        :param y: 特殊点纵坐标
+        :param dtype: 棋盘元素类型，默认用label_dtype选能放下所有标注的最小类型
+        """
+        self.special_block = (x, y)
+        self.board = np.zeros(side * side, dtype=dtype or label_dtype(side))
+        self.board[morton_index(x, y)] = (side * side - 1) // 3 + 1
+        self.t = 1
+        self.side = side
+
+    @classmethod
+    def from_rowmajor(cls, board, special_block):
+        """
+        把普通行优先的标注棋盘转换成MortonBoard
+
+        :param board: (side, side)的标注棋盘
+        :param special_block: 特殊点坐标(x, y)
+        :return: MortonBoard
+        """
+        side = board.shape[0]
+        obj = cls(side, *special_block, dtype=board.dtype)
+        obj.board[_morton_grid(side)] = board
+        obj.t = (side * side - 1) // 3 + 1
+        return obj
+
+    def to_rowmajor(self):
+        """
+        转换成行优先的(side, side)数组，供visualize和导出使用
+
+        :return: np.ndarray
+        """
+        return self.board[_morton_grid(self.side)]
+
+    def sub_board(self, t_x, t_y, size):
+        """
+        取出左上角为(t_x, t_y)、边长为size的对齐子区块
+
+        :param t_x: 子区块左上角x，必须是size的倍数
+        :param t_y: 子区块左上角y，必须是size的倍数
+        :param size: 子区块边长
+        :return: self.board中连续的一段视图，内部同样按Morton顺序排列
+        """
+        if t_x % size or t_y % size:
+            raise ValueError("子区块没有按边长对齐")
+        start = morton_index(t_x, t_y)
+        return self.board[start : start + size * size]
+
+    def visualize(self):
+        """
+        可视化函数
+        :return: None
+        """
+        Board._from_array(self.to_rowmajor(), self.t).visualize()
+
+    def fill(self, t_x=0, t_y=0, side=None, d_x=None, d_y=None):
+        """
+        填充一个对齐的区块，标注与Board.fill完全一致，参数与Board的各个引擎相同
+
+        与Board.fill_template相同：不含特殊点的象限用模板加偏移整块写入，
+        只有特殊点所在的路径逐层处理。Morton顺序下每个象限和每个模板
+        都是连续的一维数组，复制就是一整段连续内存的拷贝。
+
+        :param t_x: 区块左上角x，必须是side的倍数
+        :param t_y: 区块左上角y，必须是side的倍数
+        :param side: 区块边长，默认整个棋盘
+        :param d_x: 区块内特殊点x，默认棋盘的特殊点
+        :param d_y: 区块内特殊点y，默认棋盘的特殊点
+        :return: None
+        """
+        if side is None:
+            side = self.side
+        if d_x is None or d_y is None:
+            d_x, d_y = self.special_block
+        t_x, t_y, side, d_x, d_y = (int(v) for v in (t_x, t_y, side, d_x, d_y))
+        if t_x % side or t_y % side:
+            raise ValueError("子区块没有按边长对齐")
+        if side == 1:
+            return
+        d_x -= t_x
+        d_y -= t_y
+        # 特殊点路径上每个区块的起始下标、元素个数、特殊点象限和中心骨牌标注
+        path = []
+        t = self.t
+        start = morton_index(t_x, t_y)
+        lvl = side.bit_length() - 1
+        while lvl > 0:
+            lvl -= 1
+            q = ((d_x >> lvl) & 1) * 2 + ((d_y >> lvl) & 1)
+            path.append((start, 4 << (2 * lvl), q, t))
+            t += 1 + q * _tile_count(lvl)
+            start += q << (2 * lvl)
+        templates = [np.zeros(1, dtype=self.board.dtype)] * 4
+        for start, cells, q, t in reversed(path):
+            quarter = cells >> 2
+            if quarter > 1:
+                if len(templates[0]) < quarter >> 2:
+                    templates = [
+                        _paste_morton_template(
+                            np.empty(quarter >> 2, dtype=self.board.dtype),
+                            corner,
+                            templates,
+                            0,
+                        )
+                        for corner in range(4)
+                    ]
+                for i in range(4):
+                    if i != q:
+                        region = self.board[
+                            start + i * quarter : start + (i + 1) * quarter
+                        ]
+                        offset = t + i * _tile_count(quarter.bit_length() // 2)
+                        _paste_morton_template(region, 3 - i, templates, offset)
+            # 中心骨牌的格子是各象限靠近中心的角
+            for i in range(4):
+                if i != q:
+                    self.board[start + i * quarter + _morton_corner(3 - i, quarter)] = t
+        self.t += _tile_count(side.bit_length() - 1)
+
+    def validate(self):
+        """
+        校验填充结果是否为合法的L型骨牌覆盖，见validate_tiling
+
+        :return: None，不合法时抛出ValueError
+        """
+        validate_tiling(self.to_rowmajor(), self.special_block)
+
+
+def morton_index(x, y):
+    """
+    格子(x, y)在Morton顺序中的下标，x的位在高位，支持坐标小于2^32
+
+    :param x: 横坐标（整数或整数数组）
+    :param y: 纵坐标（整数或整数数组）
+    :return: 下标（整数或整数数组）
+    """
+    return _spread_bits(x) << 1 | _spread_bits(y)
+
+
+def _spread_bits(v):
+    """
+    把v的二进制位隔位展开：b2 b1 b0 -> b2 0 b1 0 b0
+
+    :param v: 小于2^32的非负整数或整数数组
+    :return: 展开后的值
+    """
+    v = (v | v << 16) & 0x0000FFFF0000FFFF
+    v = (v | v << 8) & 0x00FF00FF00FF00FF
+    v = (v | v << 4) & 0x0F0F0F0F0F0F0F0F
+    v = (v | v << 2) & 0x3333333333333333
+    return (v | v << 1) & 0x5555555555555555
+
+
+def _morton_grid(side):
+    """
+    行优先棋盘每一格对应的Morton下标
+
+    :param side: 棋盘边长
+    :return: (side, side)的int64下标数组
+    """
+    spread = _spread_bits(np.arange(side, dtype=np.int64))
+    return spread[:, None] << 1 | spread[None, :]
+
+
+def _morton_corner(corner, cells):
+    """
+    Morton顺序下区块某个角的下标
+
+    :param corner: 角的编号，同象限：0左上 1右上 2左下 3右下
+    :param cells: 区块的格子数
+    :return: 下标，依次为0, (cells-1)/3, 2(cells-1)/3, cells-1
+    """
+    return corner * (cells - 1) // 3
+
+
+def _paste_morton_template(out, corner, templates, offset):
+    """
+    _paste_template的Morton顺序版本，每个象限都是连续的一段
+
+    :param out: 写入的目标区块（一维）
+    :param corner: 特殊点所在的角，编号同象限：0左上 1右上 2左下 3右下
+    :param templates: 四分之一大小的四个模板，下标为特殊点所在的角
+    :param offset: 加到相对标注上的偏移，中心骨牌为offset+1，特殊点为offset
+    :return: out
+    """
+    quarter = len(templates[0])
+    count = _tile_count(quarter.bit_length() // 2)
+    for q in range(4):
+        sub = templates[corner if q == corner else 3 - q]
+        np.add(sub, offset + 1 + q * count, out=out[q * quarter : (q + 1) * quarter])
+    for q in range(4):
+        if q != corner:
+            out[q * quarter + _morton_corner(3 - q, quarter)] = offset + 1
+    out[_morton_corner(corner, len(out))] = offset
+    return out
+
+
+class CompressedBoard:
+    def __init__(self, k, x, y):
+        """
+        压缩表示的已填棋盘，占用O(k)空间
+
+        只有特殊点所在路径上的区块需要单独记录中心骨牌；
+        路径外的每个象限都是"特殊点在某个角"的标准区块加上标注偏移，
+        记为引用(t_x, t_y, lvl, corner, offset)，边长不超过2^_TEMPLATE_LEVEL的
+        标准区块在所有压缩棋盘之间共享一份缓存。
+
+        :param k: 棋盘大小的指数，边长为2^k
+        :param x: 特殊点横坐标
+        :param y: 特殊点纵坐标
+        """
+        _check_defect(k, (x, y))
+        self.k = k
+        self.side = 2**k
+        self.special_block = (x, y)
+        # 路径上每层的中心骨牌：(c_x, c_y, 特殊点象限, 标注)
+        self.centres = []
+        # 路径外的象限：(t_x, t_y, 边长指数, 特殊点所在的角, 标注偏移)
+        self.refs = []
+        t = 1
+        t_x = t_y = 0
+        for lvl in range(k - 1, -1, -1):
+            half = 1 << lvl
+            q = ((x >> lvl) & 1) * 2 + ((y >> lvl) & 1)
+            self.centres.append((t_x + half - 1, t_y + half - 1, q, t))
+            for i in range(4):
+                if i != q:
+                    ref = (t_x + (i >> 1) * half, t_y + (i & 1) * half, lvl, 3 - i)
+                    self.refs.append((*ref, t + i * _tile_count(lvl)))
+            t += 1 + q * _tile_count(lvl)
+            t_x += (q >> 1) * half
+            t_y += (q & 1) * half
+
+    def __getitem__(self, cell):
+        """
+        随机访问一格的标注，O(k)
+
+        :param cell: (x, y)
+        :return: 标注
+        """
+        return tile_at(self.k, self.special_block, *cell)
+
+    def region(self, r0, r1, c0, c1, out=None):
+        """
+        解压缩窗口[r0:r1, c0:c1]内的标注
+
+        :param r0: 起始行
+        :param r1: 结束行（不含）
+        :param c0: 起始列
+        :param c1: 结束列（不含）
+        :param out: 写入的(r1-r0, c1-c0)数组，默认新建
+        :return: (r1-r0, c1-c0)的标注数组，窗口超出棋盘时抛出ValueError
+        """
+        if not (0 <= r0 <= r1 <= self.side and 0 <= c0 <= c1 <= self.side):
+            raise ValueError("窗口超出棋盘范围")
+        if out is None:
+            out = np.zeros((r1 - r0, c1 - c0), dtype=label_dtype(self.side))
+        for ref in self.refs:
+            _expand_ref(out, r0, c0, *ref)
+        # 中心骨牌最后写，覆盖各象限引用中的特殊点
+        for c_x, c_y, q, t in self.centres:
+            for i in range(4):
+                if i != q:
+                    _put(out, r0, c0, c_x + (i >> 1), c_y + (i & 1), t)
+        _put(out, r0, c0, *self.special_block, _tile_count(self.k) + 1)
+        return out
+
+    def decompress(self):
+        """
+        解压缩整个棋盘
+
+        :return: 与Board.fill结果相同的(side, side)数组
+        """
+        return self.region(0, self.side, 0, self.side)
+
+    def to_bytes(self):
+        """
+        序列化
+
+        :return: bytes
+        """
+        header = [self.k, *self.special_block, len(self.centres), len(self.refs)]
+        rows = [header, *([*c, 0] for c in self.centres), *self.refs]
+        return np.array(rows, dtype="<i8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        反序列化to_bytes的结果
+
+        :param data: bytes
+        :return: CompressedBoard
+        """
+        rows = np.frombuffer(data, dtype="<i8").reshape(-1, 5).tolist()
+        k, x, y, n_centres, n_refs = rows[0]
+        obj = cls.__new__(cls)
+        obj.k = k
+        obj.side = 2**k
+        obj.special_block = (x, y)
+        obj.centres = [tuple(r[:4]) for r in rows[1 : 1 + n_centres]]
+        obj.refs = [tuple(r) for r in rows[1 + n_centres : 1 + n_centres + n_refs]]
+        return obj
+
+
+def solve_region(k, defect, r0, r1, c0, c1):
+    """
+    只求棋盘窗口[r0:r1, c0:c1]内的标注，用于k很大、只看局部的场合
+
+    与窗口不相交的子区块整块跳过，它们占用的标注数由边长直接算出，
+    不影响其余区块的全局标注；完全落在小模板内的部分直接切片复制。
+    耗时与窗口面积加上O(k*窗口周长)成正比，与棋盘边长无关。
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param defect: 特殊点坐标(d_x, d_y)
+    :param r0: 起始行
+    :param r1: 结束行（不含）
+    :param c0: 起始列
+    :param c1: 结束列（不含）
+    :return: (r1-r0, c1-c0)的标注数组，与Board.fill结果的对应切片相同
+    """
+    return CompressedBoard(k, *defect).region(r0, r1, c0, c1)
+
+
+@lru_cache(maxsize=None)
+def _corner_templates(lvl):
+    """
+    边长2^lvl、特殊点分别在四个角的标准区块（相对标注，特殊点为0）
+
+    :param lvl: 边长指数，不超过_TEMPLATE_LEVEL
+    :return: 四个只读数组组成的元组，下标为特殊点所在的角
+    """
+    if lvl == 0:
+        templates = (np.zeros((1, 1), dtype=np.int64),) * 4
+    else:
+        sub = _corner_templates(lvl - 1)
+        size = 1 << lvl
+        templates = tuple(
+            _paste_template(np.empty((size, size), np.int64), corner, sub, 0)
+            for corner in range(4)
+        )
+    for template in templates:
+        template.flags.writeable = False
+    return templates
+
+
+def _expand_ref(out, r0, c0, t_x, t_y, lvl, corner, offset):
+    """
+    把一个标准区块引用与窗口相交的部分写入out
+
+    :param out: 窗口数组，左上角为(r0, c0)
+    :param r0: 窗口起始行
+    :param c0: 窗口起始列
+    :param t_x: 区块左上角x
+    :param t_y: 区块左上角y
+    :param lvl: 区块边长指数
+    :param corner: 特殊点所在的角
+    :param offset: 标注偏移，同_paste_template
+    :return: None
+    """
+    size = 1 << lvl
+    x0 = max(t_x, r0)
+    x1 = min(t_x + size, r0 + out.shape[0])
+    y0 = max(t_y, c0)
+    y1 = min(t_y + size, c0 + out.shape[1])
+    if x0 >= x1 or y0 >= y1:
+        return
+    if lvl <= _TEMPLATE_LEVEL:
+        template = _corner_templates(lvl)[corner]
+        part = template[x0 - t_x : x1 - t_x, y0 - t_y : y1 - t_y]
+        np.add(
+            part,
+            offset,
+            out=out[x0 - r0 : x1 - r0, y0 - c0 : y1 - c0],
+            casting="unsafe",
+        )
+        return
+    half = size >> 1
+    count = _tile_count(lvl - 1)
+    for q in range(4):
+        sub_corner = corner if q == corner else 3 - q
+        x = t_x + (q >> 1) * half
+        y = t_y + (q & 1) * half
+        _expand_ref(out, r0, c0, x, y, lvl - 1, sub_corner, offset + 1 + q * count)
+    for q in range(4):
+        if q != corner:
+            x = t_x + half - 1 + (q >> 1)
+            y = t_y + half - 1 + (q & 1)
+            _put(out, r0, c0, x, y, offset + 1)
+
+
+def _put(out, r0, c0, x, y, value):
+    """
+    格子(x, y)在窗口内时写入value
+
+    :param out: 窗口数组，左上角为(r0, c0)
+    :param r0: 窗口起始行
+    :param c0: 窗口起始列
+    :param x: 格子横坐标
+    :param y: 格子纵坐标
+    :param value: 标注
+    :return: None
+    """
+    if 0 <= x - r0 < out.shape[0] and 0 <= y - c0 < out.shape[1]:
+        out[x - r0, y - c0] = value
+
+
+# 可选的填充引擎：名称 -> Board的方法名，所有引擎的标注结果都与fill一致
+ENGINES = {
+    "recursive": "fill",
+    "integer": "fill_int",
+    "lut": "fill_lut",
+    "stack": "fill_stack",
+    "levels": "fill_levels",
+    "template": "fill_template",
+    "blocks": "fill_blocks",
+    "parallel": "fill_parallel",
+}
+
+
+def tile_at(k, defect, x, y):
+    """
+    不构造棋盘，直接求出覆盖格子(x, y)的骨牌标注
+
+    fill按深度优先顺序分配标注，边长2^j的区块恰好含(4^j-1)/3块骨牌，
+    所以第q个子区块的第一块骨牌标注为 父区块标注+1+q*(4^(j-1)-1)/3。
+    只需沿(x, y)所在的象限下降k层，时间O(k)，不占额外内存。
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param defect: 特殊点坐标(d_x, d_y)
+    :param x: 查询格子横坐标
+    :param y: 查询格子纵坐标
+    :return: 与Board.fill写入board[x][y]相同的标注
+    """
+    _check_defect(k, defect)
+    d_x, d_y = defect
+    side = 1 << k
+    if not (0 <= x < side and 0 <= y < side):
+        raise ValueError("坐标超出棋盘范围")
+    if x == d_x and y == d_y:
+        return _tile_count(k) + 1
+    t = 1
+    t_x = t_y = 0
+    for j in range(k - 1, -1, -1):
+        half = 1 << j
+        # 格子与特殊点各自所在的象限
+        q = ((x >> j) & 1) * 2 + ((y >> j) & 1)
+        if q != ((d_x >> j) & 1) * 2 + ((d_y >> j) & 1):
+            # 该象限靠近中心的格子属于本区块的骨牌，同时也是子区块的特殊点
+            d_x = t_x + half - 1 + (q >> 1)
+            d_y = t_y + half - 1 + (q & 1)
+            if x == d_x and y == d_y:
+                return t
+        t += 1 + q * _tile_count(j)
+        t_x += (q >> 1) * half
+        t_y += (q & 1) * half
+
+
+def tile_at_batch(k, defect, xs, ys):
+    """
+    tile_at的向量化版本，一次查询一组格子
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param defect: 特殊点坐标(d_x, d_y)
+    :param xs: 查询格子横坐标数组
+    :param ys: 查询格子纵坐标数组
+    :return: 与xs, ys广播后形状相同的int64标注数组
+    """
+    _check_defect(k, defect)
+    xs, ys = np.broadcast_arrays(
+        np.asarray(xs, dtype=np.int64), np.asarray(ys, dtype=np.int64)
+    )
+    side = 1 << k
+    if xs.size and (
+        xs.min() < 0 or ys.min() < 0 or xs.max() >= side or ys.max() >= side
+    ):
+        raise ValueError("坐标超出棋盘范围")
+    d_x = np.full(xs.shape, defect[0], dtype=np.int64)
+    d_y = np.full(xs.shape, defect[1], dtype=np.int64)
+    t = np.ones(xs.shape, dtype=np.int64)
+    t_x = np.zeros(xs.shape, dtype=np.int64)
+    t_y = np.zeros(xs.shape, dtype=np.int64)
+    out = np.full(xs.shape, _tile_count(k) + 1, dtype=np.int64)
+    # 尚未确定标注的格子，特殊点本身一开始就确定了
+    pending = (xs != d_x) | (ys != d_y)
+    for j in range(k - 1, -1, -1):
+        half = 1 << j
+        q_x = (xs >> j) & 1
+        q_y = (ys >> j) & 1
+        moved = (q_x != ((d_x >> j) & 1)) | (q_y != ((d_y >> j) & 1))
+        d_x = np.where(moved, t_x + half - 1 + q_x, d_x)
+        d_y = np.where(moved, t_y + half - 1 + q_y, d_y)
+        hit = pending & moved & (xs == d_x) & (ys == d_y)
+        out[hit] = t[hit]
+        pending &= ~hit
+        t += 1 + (q_x * 2 + q_y) * _tile_count(j)
+        t_x += q_x * half
+        t_y += q_y * half
+    return out
+
+
+def tile_cells(k, defect, label):
+    """
+    不构造棋盘，直接求出标注为label的骨牌的三个格子，O(k)
+
+    标注是深度优先的序号：区块的中心骨牌标注为t，第q个子区块占用
+    t+1+q*T 到 t+(q+1)*T（T为子区块的骨牌数），据此逐层确定所在的子区块。
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param defect: 特殊点坐标(d_x, d_y)
+    :param label: 骨牌标注，1到(4^k-1)/3
+    :return: 按行优先排列的三个格子((x, y), ...)
+    """
+    _check_defect(k, defect)
+    if not 1 <= label <= _tile_count(k):
+        raise ValueError("标注超出范围")
+    d_x, d_y = defect
+    t = 1
+    t_x = t_y = 0
+    for lvl in range(k - 1, -1, -1):
+        half = 1 << lvl
+        c_x = t_x + half - 1
+        c_y = t_y + half - 1
+        q = (d_x > c_x) * 2 + (d_y > c_y)
+        if label == t:
+            return tuple((c_x + i, c_y + j) for i, j in _QUAD_TABLE[q][0])
+        p = (label - t - 1) // _tile_count(lvl)
+        if p != q:
+            d_x = c_x + (p >> 1)
+            d_y = c_y + (p & 1)
+        t += 1 + p * _tile_count(lvl)
+        t_x += (p >> 1) * half
+        t_y += (p & 1) * half
+
+
+def tile_cells_batch(k, defect, labels):
+    """
+    tile_cells的向量化版本
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param defect: 特殊点坐标(d_x, d_y)
+    :param labels: 骨牌标注数组
+    :return: (n, 3, 2)的int64数组，每块骨牌的三个格子按行优先排列
+    """
+    _check_defect(k, defect)
+    labels = np.asarray(labels, dtype=np.int64).ravel()
+    if len(labels) and (labels.min() < 1 or labels.max() > _tile_count(k)):
+        raise ValueError("标注超出范围")
+    shape = labels.shape
+    d_x = np.full(shape, defect[0], dtype=np.int64)
+    d_y = np.full(shape, defect[1], dtype=np.int64)
+    t = np.ones(shape, dtype=np.int64)
+    t_x = np.zeros(shape, dtype=np.int64)
+    t_y = np.zeros(shape, dtype=np.int64)
+    # 找到时记下中心左上格和特殊点所在象限
+    centre = np.zeros(shape + (2,), dtype=np.int64)
+    quad = np.zeros(shape, dtype=np.int64)
+    for lvl in range(k - 1, -1, -1):
+        half = 1 << lvl
+        c_x = t_x + half - 1
+        c_y = t_y + half - 1
+        q = (d_x > c_x) * 2 + (d_y > c_y)
+        hit = labels == t
+        centre[hit, 0] = c_x[hit]
+        centre[hit, 1] = c_y[hit]
+        quad[hit] = q[hit]
+        if lvl == 0:
+            break
+        # 已找到的标注之后不会再等于任何t，继续计算也不影响结果
+        p = np.maximum(labels - t - 1, 0) // _tile_count(lvl)
+        moved = p != q
+        d_x = np.where(moved, c_x + (p >> 1), d_x)
+        d_y = np.where(moved, c_y + (p & 1), d_y)
+        t += 1 + p * _tile_count(lvl)
+        t_x += (p >> 1) * half
+        t_y += (p & 1) * half
+    quads = _TROMINO_QUADS[quad]
+    return centre[:, None, :] + np.stack([quads >> 1, quads & 1], axis=-1)
+
+
+def iter_trominoes(k, defect):
+    """
+    按fill分配标注的顺序逐块生成骨牌，不构造棋盘
+
+    用显式栈做深度优先遍历，栈中最多3k+1个区块，内存O(k)，
+    可以把k很大的覆盖方案直接写到文件或网络而不必分配side*side的数组。
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param defect: 特殊点坐标(d_x, d_y)
+    :return: 生成器，每项为(标注, 按行优先排列的三个格子, 朝向)，
+        朝向为骨牌2x2方框中缺掉那一格的象限编号，同encode_orientation
+    """
+    # 先检查再返回生成器，坐标无效时调用处立即报错
+    _check_defect(k, defect)
+    return _iter_trominoes(k, defect)
+
+
+def _iter_trominoes(k, defect):
+    """
+    iter_trominoes的生成器本体
+
+    :param k: 棋盘大小的指数
+    :param defect: 已检查过的特殊点坐标
+    :return: 生成器，同iter_trominoes
+    """
+    t = 1
+    stack = [(0, 0, k, defect[0], defect[1])]
+    while stack:
+        t_x, t_y, lvl, d_x, d_y = stack.pop()
+        if lvl == 0:
+            continue
+        lvl -= 1
+        c_x = t_x + (1 << lvl) - 1
+        c_y = t_y + (1 << lvl) - 1
+        q = (d_x > c_x) * 2 + (d_y > c_y)
+        tromino, quads = _QUAD_TABLE[q]
+        yield t, tuple((c_x + i, c_y + j) for i, j in tromino), q
+        t += 1
+        for p, i, j in reversed(quads):
+            if p == q:
+                stack.append((t_x + (i << lvl), t_y + (j << lvl), lvl, d_x, d_y))
+            else:
+                stack.append(
+                    (t_x + (i << lvl), t_y + (j << lvl), lvl, c_x + i, c_y + j)
+                )
+
+
+def iter_tromino_chunks(k, defect, block=256):
+    """
+    iter_trominoes的分块版本，每次生成一批骨牌的数组
+
+    边长不超过block的子区块在临时棋盘上用模板引擎一次求出，
+    再按标注排序得到骨牌，内存O(block^2 + k)，比逐块生成快得多。
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param defect: 特殊点坐标(d_x, d_y)
+    :param block: 一次求解的子区块边长
+    :return: 生成器，每项为(标注(n,), 格子坐标(n, 3, 2), 朝向(n,))，
+        各批首尾相接即为iter_trominoes的完整顺序
+    """
+    _check_defect(k, defect)
+    return _iter_tromino_chunks(k, defect, block)
+
+
+def _iter_tromino_chunks(k, defect, block):
+    """
+    iter_tromino_chunks的生成器本体
+
+    :param k: 棋盘大小的指数
+    :param defect: 已检查过的特殊点坐标
+    :param block: 一次求解的子区块边长
+    :return: 生成器，同iter_tromino_chunks
+    """
+    scratch = None
+    pending = []
+    stack = [(0, 0, 1 << k, defect[0], defect[1], 1)]
+    while stack:
+        task = stack.pop()
+        t_x, t_y, size, d_x, d_y, t = task
+        if size == 1:
+            continue
+        if size > block:
+            # 上层区块只有一块中心骨牌，攒起来与下一批一起输出
+            cells, children = _split_block(*task)
+            pending.append((t, cells, (d_x > cells[0][0]) * 2 + (d_y > cells[0][1])))
+            stack.extend(reversed(children))
+            continue
+        if scratch is None:
+            scratch = Board._from_array(np.zeros((size, size), np.int64), t)
+        scratch.board[...] = 0
+        scratch.t = t
+        scratch.fill_template(0, 0, size, d_x - t_x, d_y - t_y)
+        # 特殊点仍为0排在最前，其余每个标注恰好三格，稳定排序保证格子按行优先
+        order = np.argsort(scratch.board, axis=None, kind="stable")[1:]
+        xy = np.stack(np.divmod(order, size), axis=-1).reshape(-1, 3, 2)
+        # 三个格子在2x2方框中的行、列偏移之和为2减去缺掉那一格的偏移
+        box = xy.min(axis=1)
+        missing = 2 - (xy - box[:, None, :]).sum(axis=1)
+        orientation = missing[:, 0] * 2 + missing[:, 1]
+        xy += (t_x, t_y)
+        labels = np.arange(t, t + len(xy))
+        if pending:
+            labels = np.concatenate([[p[0] for p in pending], labels])
+            xy = np.concatenate([np.array([p[1] for p in pending]), xy])
+            orientation = np.concatenate([[p[2] for p in pending], orientation])
+            pending = []
+        yield labels, xy, orientation
+    if pending:
+        yield (
+            np.array([p[0] for p in pending]),
+            np.array([p[1] for p in pending]),
+            np.array([p[2] for p in pending]),
+        )
+
+
+def tiling_stats(k, defect):
+    """
+    不求解棋盘，直接算出骨牌总数、各朝向骨牌数及每层的分布，O(k)
+
+    路径外的区块都是"特殊点在某个角"的标准区块，它的中心骨牌朝向就是该角，
+    四个子区块中特殊点所在象限仍是该角，其余三个象限的角为3-q，
+    即角c的区块产生两个角c、角3-c以外的另两个角各一个，角3-c没有。
+    于是每层只需统计四种角的区块个数，再加上特殊点路径上的那一个区块。
+    朝向编号同encode_orientation。
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param defect: 特殊点坐标(d_x, d_y)
+    :return: dict，"tiles"为骨牌总数，"orientation"为四种朝向的骨牌数，
+        "levels"为从整块棋盘开始每层的{"side", "tiles", "orientation"}
+    """
+    _check_defect(k, defect)
+    d_x, d_y = defect
+    # 当前层四种角的标准区块个数
+    corners = [0, 0, 0, 0]
+    levels = []
+    for lvl in range(k - 1, -1, -1):
+        q = ((d_x >> lvl) & 1) * 2 + ((d_y >> lvl) & 1)
+        orientation = corners[:]
+        orientation[q] += 1
+        levels.append(
+            {"side": 2 << lvl, "tiles": sum(orientation), "orientation": orientation}
+        )
+        total = sum(corners)
+        # 下一层：角c得到自身的2倍加上其余非3-c角的各1倍，路径产生除3-q外的三个角
+        corners = [total + corners[c] - corners[3 - c] + (c != 3 - q) for c in range(4)]
+    orientation = [sum(level["orientation"][c] for level in levels) for c in range(4)]
+    return {"tiles": _tile_count(k), "orientation": orientation, "levels": levels}
+
+
+def _check_defect(k, defect):
+    """
+    检查特殊点是否在边长2^k的棋盘内
+
+    :param k: 棋盘大小的指数
+    :param defect: 特殊点坐标(d_x, d_y)
+    :return: None
+    """
+    side = 1 << k
+    if not (0 <= defect[0] < side and 0 <= defect[1] < side):
+        raise ValueError("特殊点坐标超出棋盘范围")
+
+
+def _tile_count(k):
+    """
+    边长2^k的棋盘所需L型骨牌数
+
+    :param k: 棋盘大小的指数
+    :return: (4^k-1)/3
+    """
+    return ((1 << (2 * k)) - 1) // 3
+
+
+def encode_orientation(board, stripe=256):
+    """
+    把标注棋盘压缩成每格2位的骨牌朝向
+
+    朝向取骨牌所在2x2方框中缺掉的那一格的象限编号(0左上 1右上 2左下 3右下)，
+    与标注无关，只描述形状，适合绘制和校验；特殊方块的朝向记为0。
+    标注只由棋盘大小和特殊点决定，需要时用tile_at/tile_at_batch按需求出。
+    按行条带处理，临时数组只有条带大小；不需要标注棋盘时用solve_orientation直接求。
+
+    :param board: 任意引擎填好的标注棋盘
+    :param stripe: 每次处理的行数
+    :return: uint8数组，每字节按行优先顺序存4格
+    """
+    board = np.asarray(board)
+    side = board.shape[0]
+    if side < 4:
+        return _pack_2bit(_stripe_orientation(board, 0, side))
+    return np.concatenate(
+        [
+            _pack_2bit(_stripe_orientation(board, r0, min(r0 + stripe, side)))
+            for r0 in range(0, side, stripe)
+        ]
+    )
+
+
+def _stripe_orientation(board, r0, r1):
+    """
+    求出第r0到r1-1行每格的朝向
+
+    每格只依赖上下各一行，所以多取一行上下文再去掉即可。
+
+    :param board: 标注棋盘
+    :param r0: 起始行
+    :param r1: 结束行（不含）
+    :return: (r1-r0, side)的uint8数组
+    """
+    lo = max(r0 - 1, 0)
+    part = board[lo : r1 + 1]
+    # 同一块骨牌的横向、纵向邻格方向：+1右/下，-1左/上，0没有
+    right = np.zeros(part.shape, dtype=bool)
+    right[:, :-1] = part[:, :-1] == part[:, 1:]
+    left = np.zeros(part.shape, dtype=bool)
+    left[:, 1:] = right[:, :-1]
+    down = np.zeros(part.shape, dtype=bool)
+    down[:-1] = part[:-1] == part[1:]
+    up = np.zeros(part.shape, dtype=bool)
+    up[1:] = down[:-1]
+    h = right.view(np.int8) - left.view(np.int8)
+    v = down.view(np.int8) - up.view(np.int8)
+    # 只有一个邻格的格子借用拐角格（即该邻格）另一个方向的邻格
+    h_next = np.zeros_like(h)
+    h_next[:-1] = h[1:] * down[:-1]
+    h_next[1:] += h[:-1] * up[1:]
+    v_next = np.zeros_like(v)
+    v_next[:, :-1] = v[:, 1:] * right[:, :-1]
+    v_next[:, 1:] += v[:, :-1] * left[:, 1:]
+    s = slice(r0 - lo, r0 - lo + r1 - r0)
+    h, v, h_next, v_next = h[s], v[s], h_next[s], v_next[s]
+    both = (h != 0) & (v != 0)
+    only_h = (h != 0) & ~both
+    only_v = (v != 0) & ~both
+    row = np.where(both, v > 0, np.where(only_h, v_next > 0, v < 0) & (only_h | only_v))
+    col = np.where(both, h > 0, np.where(only_h, h < 0, h_next > 0) & (only_h | only_v))
+    return row.view(np.uint8) * np.uint8(2) + col.view(np.uint8)
+
+
+def solve_orientation(k, defect):
+    """
+    不经过标注棋盘，直接求出encode_orientation格式的朝向编码
+
+    每块骨牌的朝向就是递归中它所在区块特殊点的象限q。不含特殊点的区块
+    特殊点都在角上，其朝向只由边长和角决定，直接复制打包好的模板；
+    只有含特殊点的那条路径逐层处理。除结果外只需几个模板，约每格0.25字节。
+
+    :param k: 棋盘大小的指数
+    :param defect: 特殊点坐标(x, y)
+    :return: 与encode_orientation(标注棋盘)相同的uint8数组
+    """
+    _check_defect(k, defect)
+    side = 2**k
+    d_x, d_y = defect
+    if k < 2:
+        # 一行不足4格，按行优先展开后打包
+        codes = np.zeros((side, side), dtype=np.uint8)
+        if k == 1:
+            codes[:] = d_x * 2 + d_y
+            codes[d_x, d_y] = 0
+        return _pack_2bit(codes)
+    out = np.zeros((side, side >> 2), dtype=np.uint8)
+    t_x = t_y = 0
+    size = side
+    while size > 1:
+        half = size >> 1
+        q = int(d_x >= t_x + half) * 2 + int(d_y >= t_y + half)
+        for i in range(4):
+            if i != q:
+                x = t_x + (i >> 1) * half
+                y = t_y + (i & 1) * half
+                _paste_orientation(out, x, y, half.bit_length() - 1, 3 - i)
+        # 中心骨牌覆盖三个象限模板中的特殊点
+        for i in range(4):
+            if i != q:
+                _set_code(out, t_x + half - 1 + (i >> 1), t_y + half - 1 + (i & 1), q)
+        t_x += (q >> 1) * half
+        t_y += (q & 1) * half
+        size = half
+    return out.ravel()
+
+
+@lru_cache(maxsize=None)
+def _orientation_templates(lvl):
+    """
+    边长2^lvl、特殊点分别在四个角的区块的朝向（未打包，特殊点为0）
+
+    :param lvl: 边长指数，不超过_TEMPLATE_LEVEL
+    :return: 四个只读uint8数组组成的元组，下标为特殊点所在的角
+    """
+    if lvl == 0:
+        templates = (np.zeros((1, 1), dtype=np.uint8),) * 4
+    else:
+        sub = _orientation_templates(lvl - 1)
+        h = 1 << (lvl - 1)
+        templates = []
+        for corner in range(4):
+            out = np.empty((2 * h, 2 * h), dtype=np.uint8)
+            for q in range(4):
+                out[
+                    (q >> 1) * h : ((q >> 1) + 1) * h, (q & 1) * h : ((q & 1) + 1) * h
+                ] = sub[corner if q == corner else 3 - q]
+            for q in range(4):
+                if q != corner:
+                    out[h - 1 + (q >> 1), h - 1 + (q & 1)] = corner
+            templates.append(out)
+    for template in templates:
+        template.flags.writeable = False
+    return tuple(templates)
+
+
+@lru_cache(maxsize=None)
+def _packed_orientation_templates(lvl):
+    """
+    打包后的朝向模板，每行side/4字节
+
+    :param lvl: 边长指数，2到_TEMPLATE_LEVEL
+    :return: 四个(2^lvl, 2^(lvl-2))的uint8数组组成的元组
+    """
+    size = 1 << lvl
+    return tuple(
+        _pack_2bit(template).reshape(size, size >> 2)
+        for template in _orientation_templates(lvl)
+    )
+
+
+def _paste_orientation(out, t_x, t_y, lvl, corner):
+    """
+    把特殊点在角上的区块的朝向写入打包数组
+
+    :param out: (side, side/4)的打包朝向数组
+    :param t_x: 区块左上角x
+    :param t_y: 区块左上角y
+    :param lvl: 区块边长指数
+    :param corner: 特殊点所在的角
+    :return: None
+    """
+    size = 1 << lvl
+    if lvl == 0:
+        # 只有特殊点，之后由上层中心骨牌覆盖
+        return
+    if lvl == 1:
+        for q in range(4):
+            if q != corner:
+                _set_code(out, t_x + (q >> 1), t_y + (q & 1), corner)
+        return
+    if lvl <= _TEMPLATE_LEVEL:
+        template = _packed_orientation_templates(lvl)[corner]
+        out[t_x : t_x + size, t_y >> 2 : (t_y + size) >> 2] = template
+        return
+    half = size >> 1
+    for q in range(4):
+        sub_corner = corner if q == corner else 3 - q
+        x = t_x + (q >> 1) * half
+        y = t_y + (q & 1) * half
+        _paste_orientation(out, x, y, lvl - 1, sub_corner)
+    for q in range(4):
+        if q != corner:
+            _set_code(out, t_x + half - 1 + (q >> 1), t_y + half - 1 + (q & 1), corner)
+
+
+def _set_code(out, x, y, code):
+    """
+    设置打包数组中格子(x, y)的2位朝向
+
+    :param out: (side, side/4)的打包朝向数组
+    :param x: 格子横坐标
+    :param y: 格子纵坐标
+    :param code: 朝向0~3
+    :return: None
+    """
+    shift = 2 * (y & 3)
+    out[x, y >> 2] = (int(out[x, y >> 2]) & ~(3 << shift)) | (code << shift)
+
+
+def decode_orientation(packed, side):
+    """
+    把encode_orientation的结果还原成每格一个字节的朝向数组
+
+    :param packed: encode_orientation的结果
+    :param side: 棋盘边长
+    :return: (side, side)的uint8数组，取值0~3
+    """
+    packed = np.asarray(packed, dtype=np.uint8)
+    codes = (packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3
+    return codes.ravel()[: side * side].reshape(side, side)
+
+
+def _pack_2bit(codes):
+    """
+    把取值0~3的数组按每字节4个打包
+
+    :param codes: 取值0~3的uint8数组
+    :return: 打包后的一维uint8数组
+    """
+    flat = codes.ravel()
+    flat = np.concatenate([flat, np.zeros(-len(flat) % 4, dtype=np.uint8)])
+    groups = flat.reshape(-1, 4)
+    return groups[:, 0] | groups[:, 1] << 2 | groups[:, 2] << 4 | groups[:, 3] << 6
+
+
+def validate_tiling(board, special_block=None):
+    """
+    校验任意标注棋盘是否为合法的L型骨牌覆盖
+
+    只用几次整体的NumPy运算：np.bincount检查除特殊方块外每个标注恰好覆盖3格、
+    特殊方块唯一且没有空格；再用相邻格是否同标注的掩码检查每块骨牌都是L型。
+    不检查标注顺序，任何引擎的结果都可以校验。
+
+    :param board: (side, side)的标注棋盘，side为2的幂
+    :param special_block: 给出时还检查特殊方块是否在该位置
+    :return: None，不合法时抛出ValueError
+    """
+    board = np.asarray(board)
+    side = board.shape[0]
+    if board.shape != (side, side) or side & (side - 1):
+        raise ValueError("棋盘必须是边长为2的幂的正方形")
+    special = _tile_count(side.bit_length() - 1) + 1
+    if board.max() > special:
+        raise ValueError("出现了超出范围的标注 %d" % board.max())
+    counts = np.bincount(board.ravel(), minlength=special + 1)
+    if counts[0]:
+        raise ValueError("有%d格没有被覆盖" % counts[0])
+    if counts[special] != 1:
+        raise ValueError("特殊方块出现了%d次" % counts[special])
+    bad = np.flatnonzero(counts[1:special] != 3)
+    if len(bad):
+        label = bad[0] + 1
+        raise ValueError("骨牌%d覆盖了%d格" % (label, counts[label]))
+    if special_block is not None and board[special_block] != special:
+        raise ValueError("特殊方块不在%s" % (special_block,))
+    bad = _shape_errors(board) & (board != special)
+    if bad.any():
+        x, y = np.argwhere(bad)[0]
+        raise ValueError("骨牌%d不是L型，见格子(%d, %d)" % (board[x, y], x, y))
+
+
+def validate_tiling_sample(board, special_block=None, windows=64, size=64, seed=0):
+    """
+    随机抽查若干窗口，适用于内存映射等无法整体读入的大棋盘
+
+    每个窗口连同外面一圈格子一起读入，检查窗口内的格子都被覆盖且属于L型骨牌；
+    给出special_block时还与tile_at_batch算出的标准标注逐格比对。
+
+    :param board: (side, side)的标注棋盘，可以是np.memmap
+    :param special_block: 特殊点坐标，None时只检查形状
+    :param windows: 抽查的窗口个数
+    :param size: 窗口边长
+    :param seed: 随机数种子
+    :return: None，不合法时抛出ValueError
+    """
+    side = board.shape[0]
+    k = side.bit_length() - 1
+    special = _tile_count(k) + 1
+    size = min(size, side)
+    rng = np.random.default_rng(seed)
+    for _ in range(windows):
+        r0, c0 = rng.integers(0, side - size + 1, size=2)
+        # 多读一圈，保证窗口内每格的相邻格和对角格都在
+        x0, y0 = max(r0 - 1, 0), max(c0 - 1, 0)
+        part = np.asarray(board[x0 : r0 + size + 1, y0 : c0 + size + 1])
+        inner = (slice(r0 - x0, r0 - x0 + size), slice(c0 - y0, c0 - y0 + size))
+        window = part[inner]
+        if window.min() < 1 or window.max() > special:
+            raise ValueError("窗口(%d, %d)中有空格或超出范围的标注" % (r0, c0))
+        bad = _shape_errors(part)[inner] & (window != special)
+        if bad.any():
+            x, y = np.argwhere(bad)[0]
+            raise ValueError(
+                "骨牌%d不是L型，见格子(%d, %d)" % (window[x, y], r0 + x, c0 + y)
+            )
+        if special_block is not None:
+            xs, ys = np.indices(window.shape)
+            expected = tile_at_batch(k, special_block, xs + r0, ys + c0)
+            wrong = window != expected
+            if wrong.any():
+                x, y = np.argwhere(wrong)[0]
+                raise ValueError(
+                    "格子(%d, %d)的标注为%d，应为%d"
+                    % (r0 + x, c0 + y, window[x, y], expected[x, y])
+                )
+
+
+def _shape_errors(board):
+    """
+    找出不属于L型骨牌的格子
+
+    L型骨牌的每格恰有一个或两个同标注的相邻格，且横、纵方向各至多一个；
+    拐角格的对角格不能同标注（否则是2x2的正方形）。特殊方块也会被标出，由调用者排除。
+
+    :param board: 标注数组
+    :return: 布尔数组，True表示该格有问题
+    """
+    right = np.zeros(board.shape, dtype=bool)
+    right[:, :-1] = board[:, :-1] == board[:, 1:]
+    left = np.zeros(board.shape, dtype=bool)
+    left[:, 1:] = right[:, :-1]
+    down = np.zeros(board.shape, dtype=bool)
+    down[:-1] = board[:-1] == board[1:]
+    up = np.zeros(board.shape, dtype=bool)
+    up[1:] = down[:-1]
+    h = right.astype(np.int8) + left
+    v = down.astype(np.int8) + up
+    bad = (h > 1) | (v > 1) | (h + v == 0)
+    xs, ys = np.nonzero((h == 1) & (v == 1))
+    diagonal_x = xs + down[xs, ys] - up[xs, ys]
+    diagonal_y = ys + right[xs, ys] - left[xs, ys]
+    square = board[diagonal_x, diagonal_y] == board[xs, ys]
+    bad[xs[square], ys[square]] = True
+    return bad
+
+
+def load_board(filename, mode="r"):
+    """
+    以内存映射方式打开Board保存的.npy棋盘文件，只在访问时读取对应部分
+
+    :param filename: 文件名
+    :param mode: 打开方式，"r"只读，"r+"可写
+    :return: np.memmap
+    """
+    return np.load(filename, mmap_mode=mode)
+
+
+def solve_batch(k, xs, ys):
+    """
+    一次求解同一k、不同特殊点的一批棋盘
+
+    k不超过_BATCH_FRONTIER_LEVEL时，把B个棋盘竖着叠成(B*side, side)的大数组，
+    每个棋盘作为一个根区块交给fill_levels的逐层向量化核心一起处理，
+    Python层的操作次数只与k有关。更大的k逐层写每块骨牌反而比逐个求解慢，
+    改为逐个棋盘用CompressedBoard从缓存的角模板直接展开到结果中，
+    每个棋盘的开销接近写一遍数组。
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param xs: 各棋盘特殊点横坐标
+    :param ys: 各棋盘特殊点纵坐标
+    :return: (B, side, side)的标注数组，第b个与Board(side, xs[b], ys[b]).fill结果相同
+    """
+    xs = np.asarray(xs, dtype=np.int64).ravel()
+    ys = np.asarray(ys, dtype=np.int64).ravel()
+    side = 2**k
+    if len(xs) != len(ys):
+        raise ValueError("特殊点横、纵坐标个数不一致")
+    if len(xs):
+        # 所有特殊点都在棋盘内当且仅当它们的包围盒的两个角在棋盘内
+        _check_defect(k, (xs.min(), ys.min()))
+        _check_defect(k, (xs.max(), ys.max()))
+    boards = np.zeros((len(xs), side, side), dtype=label_dtype(side))
+    rows = np.arange(len(xs)) * side
+    boards.reshape(-1, side)[rows + xs, ys] = _tile_count(k) + 1
+    if k > _BATCH_FRONTIER_LEVEL:
+        for b in range(len(xs)):
+            compressed = CompressedBoard(k, int(xs[b]), int(ys[b]))
+            compressed.region(0, side, 0, side, out=boards[b])
+        return boards
+    if side > 1 and len(xs):
+        t = np.ones(len(xs), dtype=np.int64)
+        _fill_frontier(
+            boards.reshape(-1), side, side, rows, np.zeros_like(rows), rows + xs, ys, t
+        )
+    return boards
+
+
+def sweep_defects(k, directory=None, engine="template"):
+    """
+    遍历所有特殊点位置，只求解1/8的位置，其余由正方形的8种对称变换得到
+
+    fill的构造只依赖几何关系，所以把(x, y)的解旋转或翻转后，骨牌的摆放
+    正好是变换后位置的解，只是深度优先的标注顺序不同。每块骨牌是递归树中
+    某个区块的中心骨牌，而区块的标注只由它在树中的位置决定、与特殊点无关，
+    因此每种变换对应一个只与k有关的标注置换，先用一个位置求出，之后对每个
+    位置只需一次数组变换和一次查表。
+
+    :param k: 棋盘大小的指数，边长为2^k
+    :param directory: 给出时每个位置的结果保存为directory下的k{k}_{x}_{y}.npy
+    :param engine: 求解规范位置用的引擎名
+    :return: 生成器，每项为((x, y), 与Board.fill结果相同的标注棋盘)
+    """
+    side = 2**k
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+
+    def solve(x, y):
+        board = Board(side, x, y)
+        board.solve(engine)
+        return board.board
+
+    # 每种变换的标注置换：置换[变换后棋盘的标注] = 新特殊点处解的标注
+    base = solve(0, 0)
+    remaps = []
+    for symmetry in _SYMMETRIES:
+        remap = np.empty(_tile_count(k) + 2, dtype=base.dtype)
+        remap[_transform_board(base, symmetry).ravel()] = solve(
+            *_transform_cell(0, 0, side, symmetry)
+        ).ravel()
+        remaps.append(remap)
+    # 规范位置为左上四分之一中 x <= y 的三角形，其余位置都是它们的像
+    for x in range((side + 1) // 2):
+        for y in range(x, (side + 1) // 2):
+            board = solve(x, y)
+            done = set()
+            for symmetry, remap in zip(_SYMMETRIES, remaps):
+                cell = _transform_cell(x, y, side, symmetry)
+                if cell in done:
+                    continue
+                done.add(cell)
+                result = remap[_transform_board(board, symmetry)]
+                if directory is not None:
+                    np.save(
+                        os.path.join(directory, "k%d_%d_%d.npy" % (k, *cell)), result
+                    )
+                yield cell, result
+
+
+def _transform_cell(x, y, side, symmetry):
+    """
+    对称变换后的格子坐标
+
+    :param x: 横坐标
+    :param y: 纵坐标
+    :param side: 棋盘边长
+    :param symmetry: _SYMMETRIES中的一项
+    :return: (x, y)
+    """
+    swap, flip_x, flip_y = symmetry
+    if swap:
+        x, y = y, x
+    if flip_x:
+        x = side - 1 - x
+    if flip_y:
+        y = side - 1 - y
+    return x, y
+
+
+def _transform_board(board, symmetry):
+    """
+    对称变换整个棋盘，与_transform_cell对应
+
+    :param board: 棋盘
+    :param symmetry: _SYMMETRIES中的一项
+    :return: 变换后的棋盘（视图）
+    """
+    swap, flip_x, flip_y = symmetry
+    if swap:
+        board = board.T
+    if flip_x:
+        board = np.flip(board, 0)
+    if flip_y:
+        board = np.flip(board, 1)
+    return board
+
+
+class SolutionCache:
+    def __init__(
+        self, max_bytes=256 << 20, directory=None, solver=None, max_disk_bytes=1 << 30
+    ):
+        """
+        按(k, x, y)缓存填好的棋盘
+
+        内存中按最近最少使用(LRU)淘汰，总大小不超过max_bytes；
+        给出directory时每个新解立即以.npy文件写入directory，程序重启或内存中
+        被淘汰后再次请求时以内存映射方式读回而不必重新求解。
+        磁盘上的文件总大小不超过max_disk_bytes，超出时删除最久未用的文件。
+        棋盘统一按label_dtype保存，比GUI中的int64小一半以上。
+
+        :param max_bytes: 内存中缓存棋盘的总字节数上限
+        :param directory: 磁盘缓存目录，None表示只用内存，用到时才创建
+        :param solver: 求解函数solver(k, x, y)，返回标注棋盘，默认用模板引擎
+        :param max_disk_bytes: 磁盘缓存的总字节数上限
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.solver = solver or _solve_template
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        # 命中内存、命中磁盘、需要求解、被淘汰的次数
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, k, x, y):
+        """
+        取出(k, x, y)对应的棋盘，没有缓存时求解并缓存
+
+        :param k: 棋盘大小的指数
+        :param x: 特殊点横坐标
+        :param y: 特殊点纵坐标
+        :return: 只读的标注棋盘
+        """
+        key = (k, x, y)
+        board = self.entries.get(key)
+        if board is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return board
+        path = self._path(key)
+        if path is not None and os.path.exists(path):
+            board = np.load(path, mmap_mode="r")
+            # 更新修改时间，磁盘超出上限时按它判断最久未用
+            os.utime(path)
+            self.disk_hits += 1
+        else:
+            board = np.asarray(self.solver(k, x, y)).astype(
+                label_dtype(2**k), copy=False
+            )
+            self.misses += 1
+            if path is not None:
+                self._save(path, board)
+        # 缓存中的棋盘被多处共享，设为只读防止被意外修改
+        board.flags.writeable = False
+        self._insert(key, board)
+        return board
+
+    def stats(self):
+        """
+        缓存统计
+
+        :return: dict，包含各项计数、内存中的条目数和字节数
+        """
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+        }
+
+    def clear(self):
+        """
+        清空内存中的缓存，磁盘上的文件保留
+
+        :return: None
+        """
+        self.entries.clear()
+        self.nbytes = 0
+
+    def _insert(self, key, board):
+        """
+        放入内存缓存，超出上限时淘汰最久未使用的棋盘
+
+        :param key: (k, x, y)
+        :param board: 标注棋盘
+        :return: None
+        """
+        # 比上限还大的棋盘不放进内存，只留在磁盘上
+        if board.nbytes > self.max_bytes:
+            return
+        self.entries[key] = board
+        self.nbytes += board.nbytes
+        while self.nbytes > self.max_bytes:
+            _, old = self.entries.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+
+    def _save(self, path, board):
+        """
+        把新解写入磁盘，再删除最久未用的文件直到总大小不超过上限
+
+        :param path: 文件路径
+        :param board: 标注棋盘
+        :return: None
+        """
+        # 单个棋盘就超过上限时不写盘
+        if board.nbytes > self.max_disk_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        np.save(path, board)
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npy"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            if os.path.join(self.directory, name) != path:
+                os.remove(os.path.join(self.directory, name))
+                total -= size
+
+    def _path(self, key):
+        """
+        磁盘缓存文件名
+
+        :param key: (k, x, y)
+        :return: 文件路径，只用内存时为None
+        """
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory, "k%d_%d_%d.npy" % key)
+
+
+def _solve_template(k, x, y):
+    """
+    SolutionCache默认的求解函数
+
+    :param k: 棋盘大小的指数
+    :param x: 特殊点横坐标
+    :param y: 特殊点纵坐标
+    :return: 标注棋盘
+    """
+    board = Board(2**k, x, y)
+    board.solve("template")
+    return board.board
+
+
+class FillStats:
+    def __init__(self):
+        """
+        instrument收集的递归填充统计
+
+        level_time[lvl]为边长2^lvl的区块上fill调用的总耗时（包含其子区块），
+        level_calls[lvl]为这一层的调用次数。
+        """
+        self.fill_calls = 0
+        self.fill_block_calls = 0
+        self.collisions = 0
+        self.level_calls = {}
+        self.level_time = {}
+
+    def self_time(self):
+        """
+        每层扣除子区块后自身的耗时
+
+        :return: dict，层号 -> 秒
+        """
+        return {
+            lvl: total - self.level_time.get(lvl - 1, 0.0)
+            for lvl, total in self.level_time.items()
+        }
+
+    def as_dict(self):
+        """
+        转成便于打印和保存的dict
+
+        :return: dict
+        """
+        return {
+            "fill_calls": self.fill_calls,
+            "fill_block_calls": self.fill_block_calls,
+            "collisions": self.collisions,
+            "level_calls": dict(sorted(self.level_calls.items())),
+            "level_time": dict(sorted(self.level_time.items())),
+            "level_self_time": dict(sorted(self.self_time().items())),
+        }
+
+
+def instrument(board):
+    """
+    给一个棋盘对象的fill和fill_block套上计数和计时
+
+    包装函数作为实例属性覆盖同名方法，fill内部的self.fill、self.fill_block递归调用
+    都会经过包装，因此Board和game_0_5的OptimizedBoard等类都无需修改。
+    没有调用instrument的棋盘完全不受影响。
+
+    :param board: 有fill(t_x, t_y, side, d_x, d_y)和fill_block(x, y)方法的棋盘对象
+    :return: FillStats，同时保存在board.fill_stats
+    """
+    stats = FillStats()
+    fill = board.fill
+    fill_block = board.fill_block
+    grid = board.board
+    clock = time.perf_counter
+
+    def counted_fill(t_x, t_y, side, d_x, d_y):
+        lvl = int(side).bit_length() - 1
+        stats.fill_calls += 1
+        stats.level_calls[lvl] = stats.level_calls.get(lvl, 0) + 1
+        start = clock()
+        try:
+            fill(t_x, t_y, side, d_x, d_y)
+        finally:
+            stats.level_time[lvl] = stats.level_time.get(lvl, 0.0) + clock() - start
+
+    def counted_fill_block(x, y):
+        stats.fill_block_calls += 1
+        if grid[x][y] != 0:
+            stats.collisions += 1
+        fill_block(x, y)
+
+    board.fill = counted_fill
+    board.fill_block = counted_fill_block
+    board.fill_stats = stats
+    return stats
+
+
+def uninstrument(board):
+    """
+    去掉instrument套上的包装，恢复类中原来的方法
+
+    :param board: 调用过instrument的棋盘对象
+    :return: 收集到的FillStats
+    """
+    del board.fill, board.fill_block
+    return board.__dict__.pop("fill_stats")
+
+
+# 主函数
+if __name__ == "__main__":
+    k = eval(input("请输入正整数K(棋盘大小2^k,2^k):\n"))
+    loc_x = eval(input("请输入特殊点横坐标:\n"))
+    loc_y = eval(input("请输入特殊点纵坐标:\n"))
+    side = 2**k
+    b = Board(side, loc_x, loc_y)
+    # 显式栈填充
+    b.fill_stack(0, 0, side, loc_x, loc_y)
+    b.visualize()
+    print(b.board)
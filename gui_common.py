@@ -0,0 +1,33 @@
+import os
+
+from game_0_6 import SolutionCache
+
+# 相同输入直接取缓存的结果，新解同时写入本文件旁的board_cache目录，重启后也能读回
+_cache = None
+
+
+def get_cache():
+    """
+    第一次用到时才创建缓存，磁盘目录固定在本文件所在目录下
+    :return: SolutionCache
+    """
+    global _cache
+    if _cache is None:
+        directory = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "board_cache"
+        )
+        _cache = SolutionCache(directory=directory)
+    return _cache
+
+
+def show_board(board):
+    """
+    显示标注棋盘
+    :param board: 标注棋盘数组
+    :return: None
+    """
+    import matplotlib.pyplot as plt
+
+    plt.imshow(board, cmap=plt.cm.gray)
+    plt.colorbar()
+    plt.show()
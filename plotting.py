@@ -0,0 +1,34 @@
+# 画图脚本共用的matplotlib辅助函数，不导入本仓库的其他模块，避免循环导入
+
+
+def get_pyplot(filename=None):
+    """
+    用到时才导入matplotlib.pyplot
+
+    要保存到文件时先切换到Agg后端，没有图形界面的服务器上也能运行。
+
+    :param filename: 图表要保存到的文件，None表示弹出窗口显示
+    :return: matplotlib.pyplot模块
+    """
+    if filename is not None:
+        import matplotlib
+
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def show_or_save(plt, filename=None):
+    """
+    显示当前图表，或保存到文件后关闭
+
+    :param plt: get_pyplot返回的模块
+    :param filename: 图表要保存到的文件，None表示弹出窗口显示
+    :return: None
+    """
+    if filename is None:
+        plt.show()
+    else:
+        plt.savefig(filename)
+        plt.close()